@@ -1,6 +1,6 @@
 import os
+import sys
 from glob import glob
-from astroquery.jplhorizons import Horizons
 from astropy.time import Time
 from astropy.io import fits
 from astropy.wcs import WCS
@@ -11,6 +11,11 @@ from astropy.visualization import ZScaleInterval
 from matplotlib.patches import Polygon
 from astropy import units as u
 
+# Shared on-disk Horizons cache lives with the sweep code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "TimeStLC"))
+from EphemerisCache import cached_ephemerides
+from MPCCatalog import lookup_orbit_key
+
 # Configuration
 LOCATION = "I41"  # ZTF observatory code
 CUTOUT_SIZE = 100  # Default cutout size in pixels (will auto-expand if needed)
@@ -228,8 +233,8 @@ def process_asteroid_motion(txt_path, asteroid_id):
             t = Time(obs_utc, format='iso', scale='utc')
             t_end = t + 30 * u.second  # 30 second exposure
             
-            obj = Horizons(id=asteroid_id, location=LOCATION, epochs=t_end.jd)
-            eph = obj.ephemerides()
+            eph = cached_ephemerides(asteroid_id, LOCATION, t_end.jd,
+                                     orbit_key=lookup_orbit_key(asteroid_id))
             
             if len(eph) == 0:
                 print(f"No Horizons data for {txt_path}")
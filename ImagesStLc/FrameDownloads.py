@@ -0,0 +1,177 @@
+import os
+import time
+import warnings
+import threading
+import requests
+from astropy.io import fits
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from StageTimings import StageTimer
+from RateControl import IRSA_RATE
+
+# Download engine configuration
+DOWNLOAD_WORKERS = int(os.environ.get("STLC_DOWNLOAD_WORKERS", 8))  # Frames in flight
+PER_HOST_LIMIT = int(os.environ.get("STLC_PER_HOST_LIMIT", 4))  # Concurrent transfers per server
+CHUNK_SIZE = 1 << 20  # Streaming buffer (bytes)
+TIMEOUT = (15, 120)  # Connect and read timeouts (seconds)
+PART_SUFFIX = ".part"  # Frames are written here and renamed into place once verified
+FITS_BLOCK = 2880  # FITS files are whole multiples of this many bytes
+
+class DownloadError(Exception):
+    """A transfer that ended short or produced an invalid FITS file"""
+
+def download_session(pool_size=DOWNLOAD_WORKERS):
+    """HTTP session whose keep-alive pool holds one connection per worker"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class HostLimiter:
+    """Caps how many transfers run against one host at a time"""
+
+    def __init__(self, per_host=PER_HOST_LIMIT):
+        self.per_host = per_host
+        self.lock = threading.Lock()
+        self.slots = {}
+
+    def slot(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.slots:
+                self.slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self.slots[host]
+
+def fits_structure_ok(path):
+    """Cheap check that a file looks like complete FITS: SIMPLE card and whole 2880-byte blocks"""
+    try:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            head = f.read(9)
+    except OSError:
+        return False
+    return size > 0 and size % FITS_BLOCK == 0 and head == b"SIMPLE  ="
+
+def verify_fits(path):
+    """Raise DownloadError unless path is structurally complete FITS whose DATASUMs all match
+
+    Compressed (.fz) frames are checked as stored, on their binary tables.
+    HDUs without a DATASUM keyword pass on the structure check alone.
+    """
+    if not fits_structure_ok(path):
+        raise DownloadError(f"{os.path.basename(path)} is not a complete FITS file")
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            with fits.open(path, disable_image_compression=True, memmap=False) as hdul:
+                failed = [index for index, hdu in enumerate(hdul) if hdu.verify_datasum() == 0]
+    except Exception as e:
+        raise DownloadError(f"{os.path.basename(path)} could not be read as FITS: {e}")
+    if failed:
+        raise DownloadError(f"{os.path.basename(path)} fails DATASUM in HDU {failed}")
+
+def expected_size(response, offset):
+    """Complete file size announced by a 200 or 206 response, or None if unknown
+
+    Responses with a Content-Encoding are decoded by requests, so their
+    Content-Length says nothing about the bytes written.
+    """
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        return None
+    if response.status_code == 206:
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length", "")
+    return int(length) if length.isdigit() else None
+
+def open_stream(session, url, offset=0):
+    """Start a streaming GET from byte offset, raising on HTTP errors before any body is read
+
+    Returns None when the server answers 416, i.e. nothing is left after
+    offset.
+    """
+    headers = {'Range': f"bytes={offset}-"} if offset else {}
+    response = session.get(url, stream=True, timeout=TIMEOUT, headers=headers)
+    if offset and response.status_code == 416:
+        response.close()
+        return None
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    return response
+
+def download_frame(session, url, path, limiter, rate=IRSA_RATE):
+    """Resume or start one frame's transfer and commit it once verified; returns bytes transferred
+
+    Bytes go to path + PART_SUFFIX, which an interrupted transfer leaves in
+    place. The next attempt requests only the missing range, and starts
+    over if the server ignores the Range header. A finished file must match
+    the announced size and pass verify_fits before it is renamed to path.
+    A corrupt file is deleted, so the next attempt starts from scratch.
+    The start of each transfer is paced by the rate controller, which is fed
+    the time to the response headers, so frame size does not read as
+    congestion.
+    """
+    part_path = path + PART_SUFFIX
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    with limiter.slot(url), StageTimer("frame") as timer:
+        timer.n_bytes = 0
+        response = rate.call("frame", open_stream, session, url, offset)
+        if response is not None:
+            with response:
+                if response.status_code != 206:
+                    offset = 0  # Full body; the server did not honour the Range
+                total = expected_size(response, offset)
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+                            timer.n_bytes += len(chunk)
+                    f.flush()
+                    os.fsync(f.fileno())
+            size = os.path.getsize(part_path)
+            if total is not None and size != total:
+                raise DownloadError(f"{os.path.basename(path)} ended at {size} of {total} bytes; "
+                                    f"the next run resumes it")
+        try:
+            verify_fits(part_path)
+        except DownloadError:
+            os.remove(part_path)
+            raise
+        os.replace(part_path, path)
+    return timer.n_bytes
+
+def download_frames(jobs, workers=DOWNLOAD_WORKERS, per_host=PER_HOST_LIMIT):
+    """Download (url, path, item) jobs concurrently, yielding (item, n_bytes, error) as each finishes
+
+    Jobs are submitted in the given order, so higher-priority frames start
+    first. When all jobs are done the aggregate throughput is printed.
+    """
+    if not jobs:
+        return
+    session = download_session(workers)
+    limiter = HostLimiter(per_host)
+    start_time = time.time()
+    total_bytes = n_done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(download_frame, session, url, path, limiter): item
+                   for url, path, item in jobs}
+        for future in as_completed(futures):
+            try:
+                n_bytes = future.result()
+            except Exception as e:
+                yield futures[future], None, e
+                continue
+            total_bytes += n_bytes
+            n_done += 1
+            yield futures[future], n_bytes, None
+    session.close()
+    elapsed = time.time() - start_time
+    print(f"📦 {n_done}/{len(jobs)} frames, {total_bytes / 1e6:.1f} MB in {elapsed:.1f}s "
+          f"({total_bytes / 1e6 / max(elapsed, 1e-9):.2f} MB/s, {workers} workers, "
+          f"{per_host} per host, now {IRSA_RATE.rate:.2f} requests/s)")
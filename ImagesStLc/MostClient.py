@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import requests
+from requests.adapters import HTTPAdapter
+
+from StageTimings import StageTimer
+from RateControl import IRSA_RATE
+
+# MOST client configuration
+BASE_URL = "https://irsa.ipac.caltech.edu/cgi-bin/MOST/nph-most"
+TIMEOUT = (15, 300)  # Connect and read timeouts; long windows take minutes to answer
+POOL_SIZE = 4
+CACHE_FILE = os.environ.get(  # Responses already received, keyed on the query parameters
+    "STLC_MOST_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "most_cache.sqlite")
+)
+BUSY_TIMEOUT = 60  # Seconds a writer waits for the database lock
+ERROR_MARKERS = ("<title>error", "internal server error", "service unavailable", "proxy error")
+
+class MostError(Exception):
+    """A MOST response that must not be parsed or cached"""
+
+def most_params(asteroid_name, obs_begin, obs_end, ephem_step):
+    """Query parameters of a MOST search for one object over one window"""
+    return {
+        'catalog': "ztf",
+        'input_type': "name_input",
+        'obj_name': asteroid_name,
+        'obs_begin': obs_begin.replace("-", " "),  # Sent as YYYY+MM+DD
+        'obs_end': obs_end.replace("-", " "),
+        'ephem_step': ephem_step,
+        'output_mode': "Regular"
+    }
+
+def check_response(response):
+    """Reject HTTP errors, empty bodies and MOST/IRSA error pages"""
+    response.raise_for_status()
+    body = response.text
+    head = body[:4096].lower()
+    if not body.strip() or "<html" not in head:
+        raise MostError(f"MOST returned no HTML page ({len(body)} bytes)")
+    for marker in ERROR_MARKERS:
+        if marker in head:
+            raise MostError(f"MOST returned an error page ({marker!r})")
+    return body
+
+class MostCache:
+    """SQLite cache of validated MOST pages, compressed, keyed on the query parameters"""
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " obj_name TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " body BLOB NOT NULL)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def key(params):
+        return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def get(self, params):
+        row = self.conn.execute("SELECT body FROM responses WHERE key = ?", (self.key(params),)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def put(self, params, body):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (self.key(params), params['obj_name'], time.time(), zlib.compress(body.encode("utf-8")))
+            )
+
+class MostClient:
+    """In-process MOST queries on a pooled keep-alive session, served from MostCache when possible
+
+    Requests are paced by the shared IRSA rate controller.
+    """
+
+    def __init__(self, cache_path=CACHE_FILE, use_cache=True, pool_size=POOL_SIZE, rate=IRSA_RATE):
+        self.rate = rate
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.cache = MostCache(cache_path) if use_cache else None
+
+    def query(self, asteroid_name, obs_begin, obs_end, ephem_step):
+        """MOST result page for one window, and whether it came from the cache
+
+        Raises requests.HTTPError, requests.RequestException or MostError
+        when no usable page was received.
+        """
+        params = most_params(asteroid_name, obs_begin, obs_end, ephem_step)
+        if self.cache is not None:
+            body = self.cache.get(params)
+            if body is not None:
+                return body, True
+
+        with StageTimer("most") as timer:
+            body = self.rate.call("most", self._fetch, params)
+            timer.n_bytes = len(body)
+        if self.cache is not None:
+            try:
+                self.cache.put(params, body)
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not cache MOST response for {asteroid_name}: {e}")
+        return body, False
+
+    def _fetch(self, params):
+        return check_response(self.session.get(BASE_URL, params=params, timeout=TIMEOUT))
@@ -0,0 +1,64 @@
+import sys
+import glob
+import time
+import argparse
+import tracemalloc
+
+from MostTable import parse_most_table, parse_most_table_soup
+
+ROW_TEMPLATE = (
+    "<tr><td><a href=\"https://irsa.ipac.caltech.edu/ibe/data/ztf/products/sci/2021/0315/{i:06d}/"
+    "ztf_20210315{i:06d}_000001_zr_c01_o_q1_sciimg.fits\">img</a></td><td>zr</td>"
+    "<td>ztf_20210315{i:06d}_000001_zr_c01_o_q1_sciimg.fits</td><td>2021-03-15</td>"
+    "<td>06:{m:02d}:{s:02d}</td><td>59288.{i:06d}</td><td>187.{i:06d}</td><td>-12.{i:06d}</td>"
+    "<td>1.0312</td><td>0.0451</td><td>512.3</td><td>71.2</td><td>18.4</td></tr>\n"
+)
+
+def synthetic_page(n_rows):
+    """A MOST-like result page with n_rows frame rows"""
+    rows = "".join(ROW_TEMPLATE.format(i=i, m=i // 60 % 60, s=i % 60) for i in range(n_rows))
+    return ("<html><head><title>MOST results</title></head><body><table>"
+            "<tr><th colspan=13>Results</th></tr><tr><td>Image</td><td>Band</td></tr>\n"
+            f"{rows}</table></body></html>")
+
+def measure(parse, html_content, repeats):
+    """Best wall time over repeats and the peak traced allocation of one parse"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        entries = parse(html_content)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    parse(html_content)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return entries, best, peak
+
+def main():
+    """Compare MostTableParser with the BeautifulSoup extraction on saved or synthetic pages"""
+    parser = argparse.ArgumentParser(description="Benchmark MOST result-page parsers")
+    parser.add_argument("pages", nargs="*",
+                        help="Saved MOST pages (default: every .html under mostoutput/)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 5000, 20000],
+                        help="Synthetic page sizes used when no saved pages are found")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = [(path, open(path, encoding="utf-8").read())
+             for path in args.pages or sorted(glob.glob("mostoutput/**/*.html", recursive=True))]
+    if not pages:
+        pages = [(f"synthetic {n} rows", synthetic_page(n)) for n in args.rows]
+
+    print(f"{'page':<40} {'rows':>7} {'soup s':>9} {'fast s':>9} {'speedup':>8} "
+          f"{'soup MB':>8} {'fast MB':>8}")
+    for name, html_content in pages:
+        soup_entries, soup_time, soup_peak = measure(parse_most_table_soup, html_content, args.repeats)
+        fast_entries, fast_time, fast_peak = measure(parse_most_table, html_content, args.repeats)
+        if fast_entries != soup_entries:
+            print(f"❌ {name}: parsers disagree ({len(fast_entries)} vs {len(soup_entries)} entries)")
+            sys.exit(1)
+        print(f"{name[-40:]:<40} {len(fast_entries):>7} {soup_time:>9.3f} {fast_time:>9.3f} "
+              f"{soup_time / fast_time:>7.1f}x {soup_peak / 1e6:>8.1f} {fast_peak / 1e6:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+from html.parser import HTMLParser
+
+# Result table layout of a MOST 'Regular' page
+HEADER_ROWS = 2  # Leading <tr> rows that are headers
+MIN_CELLS = 13
+FRAME_MARKER = "sciimg.fits"  # Only rows linking a science frame are kept
+COLUMNS = {  # Entry field -> cell index
+    'filename': 2,
+    'date_obs': 3,
+    'time_obs': 4,
+    'mjd_obs': 5,
+    'ra_obj': 6,
+    'dec_obj': 7,
+    'r': 8,
+    'delta': 9,
+    'dist_ctr': 10,
+    'phase': 11,
+    'vmag': 12
+}
+
+def row_entry(cells, href):
+    """Entry dict for one table row, or None if it does not describe a frame"""
+    if len(cells) < MIN_CELLS or not href or FRAME_MARKER not in href:
+        return None
+    entry = {'href': href}
+    for name, index in COLUMNS.items():
+        entry[name] = cells[index]
+    return entry
+
+class MostTableParser(HTMLParser):
+    """Event-driven extractor of the MOST result rows
+
+    Only the current row's cell texts and the first link of its first cell
+    are held; each finished row becomes an entry or is dropped, so no
+    document tree is ever built. A <td> or <tr> start also closes an open
+    cell or row, as browsers do for pages that omit end tags.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.entries = []
+        self.n_rows = 0
+        self.row = None
+        self.cell = None
+        self.href = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._end_row()
+            self.row = []
+            self.href = None
+            self.n_rows += 1
+        elif tag == "td" and self.row is not None:
+            self._end_cell()
+            self.cell = []
+        elif tag == "a" and self.cell is not None and self.href is None and len(self.row) == 0:
+            self.href = dict(attrs).get("href") or ""
+
+    def handle_endtag(self, tag):
+        if tag == "td":
+            self._end_cell()
+        elif tag in ("tr", "table"):
+            self._end_row()
+
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.cell.append(data)
+
+    def _end_cell(self):
+        if self.cell is not None:
+            self.row.append("".join(self.cell).strip())
+            self.cell = None
+
+    def _end_row(self):
+        if self.row is None:
+            return
+        self._end_cell()
+        if self.n_rows > HEADER_ROWS:
+            entry = row_entry(self.row, self.href)
+            if entry is not None:
+                self.entries.append(entry)
+        self.row = None
+
+    def close(self):
+        super().close()
+        self._end_row()
+
+def parse_most_table(html_content):
+    """Frame entries of a MOST result page, without building a DOM"""
+    parser = MostTableParser()
+    parser.feed(html_content)
+    parser.close()
+    return parser.entries
+
+def parse_most_table_soup(html_content):
+    """Reference BeautifulSoup extraction the image stage used before MostTableParser"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    data_entries = []
+    for row in soup.find_all('tr')[HEADER_ROWS:]:
+        tds = row.find_all('td')
+        link = tds[0].find('a') if tds else None
+        entry = row_entry([td.text.strip() for td in tds], link.get('href', '') if link else None)
+        if entry is not None:
+            data_entries.append(entry)
+    return data_entries
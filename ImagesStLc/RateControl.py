@@ -0,0 +1,141 @@
+import time
+import threading
+import requests
+from email.utils import parsedate_to_datetime
+
+# AIMD request-rate control for IRSA (MOST queries and frame downloads)
+INITIAL_RATE = 1.0  # Request starts per second
+MIN_RATE = 0.05
+MAX_RATE = 20.0
+BURST = 4  # Tokens the bucket holds, i.e. starts allowed back to back
+INCREASE_STEP = 0.05  # Added to the rate after each fast, successful request
+DECREASE_FACTOR = 0.5  # Applied on throttling, timeouts or rising latency
+DECREASE_COOLDOWN = 2.0  # Seconds; one cut per congestion event, however many requests see it
+LATENCY_FACTOR = 2.0  # Latency this far above its baseline counts as congestion
+LATENCY_ALPHA = 0.2  # Weight of the newest sample in the latency average
+BASELINE_DRIFT = 0.01  # Lets the baseline follow a lasting shift in server latency
+THROTTLE_STATUS = (429, 503)
+THROTTLE_RETRIES = 4  # Further attempts of a throttled request before its error is raised
+MAX_RETRY_AFTER = 600.0  # Seconds; longer Retry-After values are capped
+
+def throttled(error):
+    """Whether a failed request was refused with 429/503"""
+    return (isinstance(error, requests.HTTPError) and error.response is not None
+            and error.response.status_code in THROTTLE_STATUS)
+
+def retry_after(response):
+    """Retry-After delay of a response in seconds (delta-seconds or HTTP-date), or None"""
+    value = response.headers.get("Retry-After", "").strip()
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+def congestion_signal(error):
+    """Whether a failed request means the server wants less traffic, and its Retry-After delay"""
+    if throttled(error):
+        return True, retry_after(error.response)
+    if isinstance(error, requests.HTTPError):
+        return False, None
+    return isinstance(error, (requests.Timeout, requests.ConnectionError)), None
+
+class AimdRateController:
+    """Token bucket whose rate grows additively and shrinks multiplicatively
+
+    Every request takes a token before it starts. Successful requests whose
+    latency stays near the baseline of their kind ('most', 'frame') raise
+    the rate by INCREASE_STEP. 429/503 responses, timeouts, connection
+    errors and latency above LATENCY_FACTOR times the baseline cut it by
+    DECREASE_FACTOR, and Retry-After pauses all requests. Throttled
+    requests are retried at the reduced rate rather than dropped.
+    Thread-safe, so one controller can pace every worker talking to the
+    same server.
+    """
+
+    def __init__(self, rate=INITIAL_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE, burst=BURST):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = float("-inf")
+        self.latency = {}
+        self.baseline = {}
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may start"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def _decrease(self, now):
+        if now - self.last_decrease >= DECREASE_COOLDOWN:
+            self.rate = max(self.min_rate, self.rate * DECREASE_FACTOR)
+            self.tokens = min(self.tokens, 0.0)
+            self.last_decrease = now
+
+    def success(self, kind, latency):
+        """Feed back one successful request's latency (seconds)"""
+        with self.lock:
+            average = self.latency.get(kind, latency)
+            average += LATENCY_ALPHA * (latency - average)
+            self.latency[kind] = average
+            baseline = min(average, self.baseline.get(kind, average) * (1 + BASELINE_DRIFT))
+            self.baseline[kind] = baseline
+            if average > LATENCY_FACTOR * baseline:
+                self._decrease(time.monotonic())
+            else:
+                self.rate = min(self.max_rate, self.rate + INCREASE_STEP)
+
+    def failure(self, error):
+        """Feed back a failed request; only congestion signals change the rate"""
+        congested, retry_after = congestion_signal(error)
+        if not congested:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self._decrease(now)
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+
+    def call(self, kind, fn, *args, retries=THROTTLE_RETRIES, **kwargs):
+        """Run one request under the controller, feeding back its outcome
+
+        A request refused with 429/503 is attempted up to `retries` more
+        times. Each retry waits for a token at the reduced rate and for any
+        Retry-After pause; other errors are raised at once.
+        """
+        for attempt in range(retries + 1):
+            self.acquire()
+            start = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self.failure(e)
+                if attempt == retries or not throttled(e):
+                    raise
+                print(f"⏳ IRSA throttled a {kind} request (HTTP {e.response.status_code}); "
+                      f"retrying at {self.rate:.2f} requests/s ({attempt + 1}/{retries})")
+                continue
+            self.success(kind, time.monotonic() - start)
+            return result
+
+IRSA_RATE = AimdRateController()  # Shared by MostClient and FrameDownloads
@@ -1,17 +1,50 @@
 import os
-import subprocess
-import time
-from bs4 import BeautifulSoup
+import sys
 import requests
+import numpy as np
 from datetime import datetime, timedelta
 
+# Observable windows are produced by the sweep in TimeStLC
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "TimeStLC"))
+from CandidateStore import STORE_DIR
+from ObservingWindows import load_windows
+from StreakSNR import window_snr, priority_order
+from FrameDownloads import download_frames, fits_structure_ok
+from MostClient import MostClient, MostError
+from MostTable import parse_most_table
+
 # Configuration constants
 ASTEROID_LIST = "asteroids.txt"
-BASE_URL = "https://irsa.ipac.caltech.edu/cgi-bin/MOST/nph-most"
 OUTPUT_DIR = "mostoutput"
-DELAY_SECONDS = 5
 EPHEM_STEP = "0.25"
 MAX_GAP_DAYS = 1  # Maximum allowed gap between consecutive observations
+CANDIDATE_STORE = STORE_DIR  # Sweep output holding windows.npy (STLC_CANDIDATE_STORE)
+USE_MOST_CACHE = True  # Serve windows already queried with the same parameters from most_cache.sqlite
+SAVE_HTML = True  # Keep a copy of each MOST page in its run directory
+
+_most_client = None
+
+def load_run_queue(store_dir=CANDIDATE_STORE):
+    """Observation runs from the sweep's window table, highest predicted streak SNR first
+
+    Yields (name, run_number, start, end, snr). Runs keep their per-asteroid
+    numbering in date order, so output directories do not depend on the
+    queue order. Returns None when the sweep has not written windows.
+    """
+    try:
+        windows = load_windows(store_dir)
+    except OSError:
+        return None
+    windows = windows[np.lexsort((windows['start_jd'], windows['asteroid_id']))]
+    first = np.r_[True, windows['asteroid_id'][1:] != windows['asteroid_id'][:-1]]
+    positions = np.arange(len(windows))
+    run_numbers = positions - np.maximum.accumulate(np.where(first, positions, 0)) + 1
+    snr = window_snr(windows)
+    return (
+        (str(windows['asteroid_id'][i]), int(run_numbers[i]), str(windows['start'][i]),
+         str(windows['end'][i]), float(snr[i]))
+        for i in priority_order(snr)
+    )
 
 def parse_asteroid_dates():
     asteroid_windows = {}
@@ -64,149 +97,130 @@ def parse_asteroid_dates():
     
     return asteroid_windows
 
+def most_client():
+    """The shared in-process MOST client, created on first use"""
+    global _most_client
+    if _most_client is None:
+        _most_client = MostClient(use_cache=USE_MOST_CACHE)
+    return _most_client
+
 def fetch_asteroid_data(asteroid_name, obs_begin, obs_end, run_number):
-    # Create run-specific directory
-    run_id = f"OB{run_number}_{obs_begin.replace('-', '')}_{obs_end.replace('-', '')}"
-    asteroid_dir = os.path.join(OUTPUT_DIR, asteroid_name.replace(" ", "_"), run_id)
-    os.makedirs(asteroid_dir, exist_ok=True)
-    
-    output_file = os.path.join(asteroid_dir, f"{asteroid_name.replace(' ', '_')}_{run_id}.html")
-    
-    # Format dates for URL
-    url_begin = obs_begin.replace("-", "+")
-    url_end = obs_end.replace("-", "+")
-    
-    url = (f"{BASE_URL}?catalog=ztf"
-           f"&input_type=name_input"
-           f"&obj_name={asteroid_name}"
-           f"&obs_begin={url_begin}"
-           f"&obs_end={url_end}"
-           f"&ephem_step={EPHEM_STEP}"
-           f"&output_mode=Regular")
-    
-    cmd = ["curl", "-s", "-o", output_file, url]
-    
+    """MOST result page for one observation window, or None if the query failed
+
+    The page comes from the response cache when this window was already
+    queried with the same parameters. With SAVE_HTML a copy is written to
+    the run directory.
+    """
     try:
-        subprocess.run(cmd, check=True)
-        print(f"✅ Successfully downloaded HTML for {asteroid_name} ({obs_begin} to {obs_end})")
-        return output_file
-    except subprocess.CalledProcessError as e:
+        html_content, cached = most_client().query(asteroid_name, obs_begin, obs_end, EPHEM_STEP)
+    except (requests.RequestException, MostError) as e:
         print(f"❌ Failed to fetch data for {asteroid_name}: {e}")
         return None
-
-def process_html_file(html_file, asteroid_name):
-    print(f"\n🔍 Parsing HTML file: {html_file}")
-    try:
-        with open(html_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-    except Exception as e:
-        print(f"❌ Error reading HTML file: {e}")
-        return []
-
-    soup = BeautifulSoup(html_content, 'html.parser')
-    data_entries = []
-    
-    for row in soup.find_all('tr')[2:]:  # Skip header rows
-        tds = row.find_all('td')
-        if len(tds) < 13:
-            continue
-            
-        link = tds[0].find('a')
-        if not link or 'sciimg.fits' not in link.get('href', ''):
-            continue
-            
-        href = link['href']
-        entry = {
-            'href': href,
-            'filename': tds[2].text.strip(),
-            'date_obs': tds[3].text.strip(),
-            'time_obs': tds[4].text.strip(),
-            'mjd_obs': tds[5].text.strip(),
-            'ra_obj': tds[6].text.strip(),
-            'dec_obj': tds[7].text.strip(),
-            'r': tds[8].text.strip(),
-            'delta': tds[9].text.strip(),
-            'dist_ctr': tds[10].text.strip(),
-            'phase': tds[11].text.strip(),
-            'vmag': tds[12].text.strip()
-        }
-        data_entries.append(entry)
+    source = "Loaded cached" if cached else "Successfully downloaded"
+    print(f"✅ {source} HTML for {asteroid_name} ({obs_begin} to {obs_end})")
     
+    if SAVE_HTML:
+        # Create run-specific directory
+        run_id = f"OB{run_number}_{obs_begin.replace('-', '')}_{obs_end.replace('-', '')}"
+        asteroid_dir = os.path.join(OUTPUT_DIR, asteroid_name.replace(" ", "_"), run_id)
+        os.makedirs(asteroid_dir, exist_ok=True)
+        output_file = os.path.join(asteroid_dir, f"{asteroid_name.replace(' ', '_')}_{run_id}.html")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+    return html_content
+
+def parse_most_html(html_content):
+    data_entries = parse_most_table(html_content)
     print(f"📊 Found {len(data_entries)} valid entries in HTML")
     return data_entries
 
+def entry_vmag(entry):
+    """MOST-predicted V of a frame, unknown values last"""
+    try:
+        return float(entry['vmag'])
+    except ValueError:
+        return float('inf')
+
+def write_metadata(entry, txt_path):
+    with open(txt_path, 'w') as f:
+        metadata = f"""File: {entry['filename']}
+Observation Date: {entry['date_obs']}
+Observation Time: {entry['time_obs']}
+MJD: {entry['mjd_obs']}
+RA: {entry['ra_obj']}
+Dec: {entry['dec_obj']}
+r (AU): {entry['r']}
+Delta (AU): {entry['delta']}
+Distance Center: {entry['dist_ctr']}
+Phase: {entry['phase']}
+Vmag: {entry['vmag']}
+"""
+        f.write(metadata)
+
 def download_modified_files(data_entries, asteroid_name, run_id):
     # Create observation images directory inside the run directory
     asteroid_dir = os.path.join(OUTPUT_DIR, asteroid_name.replace(" ", "_"), run_id, "observation_images")
     os.makedirs(asteroid_dir, exist_ok=True)
     
-    for entry in data_entries:
+    # Within a run the rate barely changes, so the brightest frames have the highest streak SNR
+    jobs = []
+    for entry in sorted(data_entries, key=entry_vmag):
         modified_url = entry['href'].replace('sciimg.fits', 'scimrefdiffimg.fits.fz')
         filename = os.path.basename(modified_url)
         file_path = os.path.join(asteroid_dir, filename)
         txt_path = os.path.join(asteroid_dir, f"{filename}.txt")
         
-        if os.path.exists(file_path) and os.path.exists(txt_path):
+        # Frames are renamed into place only once verified; files from older runs get a structure check
+        if fits_structure_ok(file_path) and os.path.exists(txt_path):
             print(f"⏩ Skipping existing files for {filename}")
             continue
-            
-        # Download FITS file
-        try:
-            print(f"\n⬇️ Downloading {filename}...")
-            start_time = time.time()
-            response = requests.get(modified_url, stream=True)
-            response.raise_for_status()
-            
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            print(f"✅ Downloaded {filename} ({time.time()-start_time:.1f}s)")
-        except Exception as e:
-            print(f"❌ Failed to download {filename}: {e}")
+        if os.path.exists(file_path):
+            print(f"⚠️ Replacing incomplete frame {filename}")
+            os.remove(file_path)
+        jobs.append((modified_url, file_path, (entry, filename, txt_path)))
+    
+    # Frames download concurrently on pooled keep-alive connections, capped per host
+    print(f"\n⬇️ Downloading {len(jobs)} frames...")
+    for (entry, filename, txt_path), n_bytes, error in download_frames(jobs):
+        if error is not None:
+            print(f"❌ Failed to download {filename}: {error}")
             continue
-            
+        print(f"✅ Downloaded {filename} ({n_bytes / 1e6:.1f} MB)")
+        
         # Save metadata
         try:
-            with open(txt_path, 'w') as f:
-                metadata = f"""File: {entry['filename']}
-Observation Date: {entry['date_obs']}
-Observation Time: {entry['time_obs']}
-MJD: {entry['mjd_obs']}
-RA: {entry['ra_obj']}
-Dec: {entry['dec_obj']}
-r (AU): {entry['r']}
-Delta (AU): {entry['delta']}
-Distance Center: {entry['dist_ctr']}
-Phase: {entry['phase']}
-Vmag: {entry['vmag']}
-"""
-                f.write(metadata)
+            write_metadata(entry, txt_path)
             print(f"📝 Saved metadata to {filename}.txt")
         except Exception as e:
             print(f"⚠️ Failed to save metadata: {e}")
-        
-        time.sleep(1)  # Rate limiting
 
 def process_asteroids():
-    asteroid_windows = parse_asteroid_dates()
+    # Highest predicted streak SNR first, so stopping early keeps the most useful data
+    run_queue = load_run_queue()
+    if run_queue is None:
+        print(f"⚠️ WARNING: no window table in {os.path.abspath(CANDIDATE_STORE)}. Falling back to "
+              f"grouping dates from {ASTEROID_LIST}, which ignores the sweep's windows and SNR order. "
+              f"Run TimeStLC/SweepEngine.py first or set STLC_CANDIDATE_STORE.")
+        run_queue = (
+            (name, run_idx, obs_begin, obs_end, None)
+            for name, observation_runs in parse_asteroid_dates().items()
+            for run_idx, (obs_begin, obs_end) in enumerate(observation_runs, 1)
+        )
     
-    for asteroid_name, observation_runs in asteroid_windows.items():
+    for asteroid_name, run_idx, obs_begin, obs_end, snr in run_queue:
         print(f"\n🛰️ Processing asteroid: {asteroid_name}")
+        predicted = f" (predicted streak SNR {snr:.1f})" if snr is not None else ""
+        print(f"📅 Processing observation run {run_idx}: {obs_begin} to {obs_end}{predicted}")
         
-        for run_idx, (obs_begin, obs_end) in enumerate(observation_runs, 1):
-            print(f"📅 Processing observation run {run_idx}: {obs_begin} to {obs_end}")
-            
-            run_id = f"OB{run_idx}_{obs_begin.replace('-', '')}_{obs_end.replace('-', '')}"
-            html_file = fetch_asteroid_data(asteroid_name, obs_begin, obs_end, run_idx)
-            
-            if html_file:
-                entries = process_html_file(html_file, asteroid_name)
-                if entries:
-                    download_modified_files(entries, asteroid_name, run_id)
-                else:
-                    print(f"⚠️ No downloadable content found for {asteroid_name} in this run")
-            time.sleep(DELAY_SECONDS)
+        run_id = f"OB{run_idx}_{obs_begin.replace('-', '')}_{obs_end.replace('-', '')}"
+        html_content = fetch_asteroid_data(asteroid_name, obs_begin, obs_end, run_idx)
+        
+        if html_content:
+            entries = parse_most_html(html_content)
+            if entries:
+                download_modified_files(entries, asteroid_name, run_id)
+            else:
+                print(f"⚠️ No downloadable content found for {asteroid_name} in this run")
 
 if __name__ == "__main__":
     os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -0,0 +1,78 @@
+import numpy as np
+from astropy.time import Time
+
+from SweepEngine import (query_ephemerides, ephemeris_columns, filter_observations,
+                         OBSERVATION_DTYPE, V_LIMIT, RATE_LIMIT)
+
+# Coarse-to-fine sampling parameters
+COARSE_STEP = "1d"  # First pass over the full date range
+FINE_STEP = "1h"  # Resampling step inside flagged intervals
+V_MARGIN = 1.0  # Refine where V comes within this many magnitudes of V_LIMIT
+RATE_FRACTION = 0.5  # ...and the motion rate exceeds this fraction of RATE_LIMIT
+
+def motion_rates(eph):
+    """Total sky-motion rate ("/min) for every row of an ephemeris table"""
+    ra_rate = np.ma.filled(np.ma.asarray(eph["RA_rate"], dtype=float), np.nan) / 60
+    dec_rate = np.ma.filled(np.ma.asarray(eph["DEC_rate"], dtype=float), np.nan) / 60
+    return np.hypot(ra_rate, dec_rate)
+
+def refinement_intervals(jd, v_mag, motion_rate, v_margin=V_MARGIN, rate_fraction=RATE_FRACTION):
+    """Find JD intervals around coarse samples that come close to both thresholds
+
+    Runs of flagged samples are padded by one coarse sample on each side, so a
+    short rate spike between two daily samples still falls inside an interval.
+    Overlapping intervals are merged, giving one fine query per interval.
+    """
+    with np.errstate(invalid="ignore"):
+        near = (v_mag < V_LIMIT + v_margin) & (motion_rate > RATE_LIMIT * rate_fraction)
+    flagged = np.flatnonzero(near)
+    if not flagged.size:
+        return []
+
+    # Run-length group consecutive flagged samples
+    breaks = np.flatnonzero(np.diff(flagged) > 1)
+    run_starts = flagged[np.r_[0, breaks + 1]]
+    run_ends = flagged[np.r_[breaks, flagged.size - 1]]
+    lo = jd[np.maximum(run_starts - 1, 0)]
+    hi = jd[np.minimum(run_ends + 1, jd.size - 1)]
+
+    intervals = []
+    for start, end in zip(lo, hi):
+        if intervals and start <= intervals[-1][1]:
+            intervals[-1][1] = max(intervals[-1][1], end)
+        else:
+            intervals.append([start, end])
+    return [(float(start), float(end)) for start, end in intervals]
+
+def jd_to_epoch(jd):
+    """Format a JD as a Horizons calendar epoch string"""
+    return Time(jd, format="jd", scale="utc").strftime("%Y-%m-%d %H:%M")
+
+def adaptive_observations(asteroid_id, location, start_date, end_date, orbit_key=None,
+                          use_cache=True, session=None, unfiltered=False, lean=False):
+    """Valid observations from a coarse sweep refined around close approaches
+
+    Coarse rows inside a refinement interval are replaced by the fine rows
+    for that interval; rows elsewhere come from the coarse pass unchanged.
+    With unfiltered every merged row is returned, not only passing ones.
+    """
+    select = ephemeris_columns if unfiltered else filter_observations
+    coarse = query_ephemerides(asteroid_id, location, start_date, end_date, session=session,
+                               orbit_key=orbit_key, use_cache=use_cache, step=COARSE_STEP,
+                               lean=lean)
+    jd = np.asarray(coarse["datetime_jd"], dtype=float)
+    v_mag = np.ma.filled(np.ma.asarray(coarse["V"], dtype=float), np.nan)
+    intervals = refinement_intervals(jd, v_mag, motion_rates(coarse))
+
+    outside = np.ones(jd.size, dtype=bool)
+    parts = []
+    for start, end in intervals:
+        outside &= (jd < start) | (jd > end)
+        fine = query_ephemerides(asteroid_id, location, jd_to_epoch(start), jd_to_epoch(end),
+                                 session=session, orbit_key=orbit_key, use_cache=use_cache,
+                                 step=FINE_STEP, lean=lean, stage="horizons_fine")
+        parts.append(select(fine))
+    parts.append(select(coarse[outside]))
+
+    observations = np.concatenate(parts) if parts else np.empty(0, dtype=OBSERVATION_DTYPE)
+    return observations[np.argsort(observations['jd'], kind="stable")]
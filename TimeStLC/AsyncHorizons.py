@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import requests
+import numpy as np
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+
+from SweepEngine import observe_object, OBSERVATION_DTYPE
+from SweepJournal import call_with_retry
+
+# Async fetch parameters
+CONCURRENCY = 16  # Horizons requests kept in flight
+MAX_RATE = 8.0  # Maximum request starts per second (0 disables the limit)
+
+_local = threading.local()
+
+def pooled_session(pool_size=CONCURRENCY):
+    """Return this thread's keep-alive session with a sized connection pool"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+class RateLimiter:
+    """Space request starts so that no more than `rate` begin per second"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            delay = self._next_start - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = max(now, self._next_start) + self.interval
+
+def _fetch_blocking(asteroid_id, location, start_date, end_date, pool_size,
+                    orbit_key=None, use_cache=True, adaptive=False, unfiltered=False,
+                    lean=False, magnitude=None):
+    """Run one object's Horizons queries on the calling thread's pooled session"""
+    return observe_object(asteroid_id, location, start_date, end_date, orbit_key, use_cache,
+                          adaptive, pooled_session(pool_size), unfiltered, lean, magnitude)
+
+async def fetch_observations_async(asteroid_ids, location, start_date, end_date,
+                                   concurrency=CONCURRENCY, rate=MAX_RATE,
+                                   orbit_keys=None, use_cache=True, adaptive=False,
+                                   with_status=False, unfiltered=False, lean=False,
+                                   magnitudes=None, on_result=None):
+    """Fetch valid observations for many asteroids with bounded concurrency
+
+    Returns a dict mapping asteroid ID to the same observation array that
+    check_conditions produces; failed queries map to an empty array. With
+    with_status each object is retried with backoff (SweepJournal) and maps
+    to a (state, observations, error, attempts) tuple instead. With
+    unfiltered the arrays hold every ephemeris row, and lean selects the
+    lean Horizons query mode. magnitudes maps IDs to (H, G) for locally
+    computed ephemerides (see observe_object). on_result(asteroid_id,
+    result) is called on the event loop as each object finishes, so callers
+    can persist results before the whole batch is done.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+    orbit_keys = orbit_keys or {}
+    magnitudes = magnitudes or {}
+    results = {}
+
+    async def fetch_one(asteroid_id, executor):
+        async with semaphore:
+            await limiter.wait()
+            args = (asteroid_id, location, start_date, end_date, concurrency,
+                    orbit_keys.get(asteroid_id), use_cache, adaptive, unfiltered, lean,
+                    magnitudes.get(asteroid_id))
+            if with_status:
+                # call_with_retry retries and classifies failures itself, for the journal.
+                # Backoff sleeps hold the slot, which also slows the other requests
+                results[asteroid_id] = await loop.run_in_executor(
+                    executor, call_with_retry, _fetch_blocking, *args
+                )
+            else:
+                try:
+                    results[asteroid_id] = await loop.run_in_executor(executor, _fetch_blocking, *args)
+                except Exception as e:
+                    print(f"⚠️ Query failed for {asteroid_id}: {e}")
+                    results[asteroid_id] = np.empty(0, dtype=OBSERVATION_DTYPE)
+        if on_result is not None:
+            on_result(asteroid_id, results[asteroid_id])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        await asyncio.gather(*(fetch_one(asteroid_id, executor) for asteroid_id in asteroid_ids))
+
+    return results
+
+def fetch_observations(asteroid_ids, location, start_date, end_date,
+                       concurrency=CONCURRENCY, rate=MAX_RATE,
+                       orbit_keys=None, use_cache=True, adaptive=False, with_status=False,
+                       unfiltered=False, lean=False, magnitudes=None, on_result=None):
+    """Synchronous entry point for fetch_observations_async"""
+    return asyncio.run(fetch_observations_async(
+        asteroid_ids, location, start_date, end_date, concurrency, rate,
+        orbit_keys, use_cache, adaptive, with_status, unfiltered, lean, magnitudes, on_result
+    ))
@@ -0,0 +1,123 @@
+import os
+import glob
+import numpy as np
+
+# Columnar candidate store layout
+STORE_DIR = os.environ.get(  # Root of the store, read by the image stage as well
+    "STLC_CANDIDATE_STORE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "candidate_store")
+)
+SHARDS_SUBDIR = "shards"  # One committed .npy per sweep shard
+COMPACT_FILE = "candidates.npy"  # De-duplicated, sorted table of all candidates
+BASE_SHARD = "shard_base.npy"  # Merged result of incremental (delta) sweeps
+
+CANDIDATE_DTYPE = np.dtype([
+    ('asteroid_id', 'U12'),
+    ('timestamp', 'U24'),
+    ('jd', 'f8'),
+    ('v_mag', 'f8'),
+    ('ra_rate', 'f8'),
+    ('dec_rate', 'f8'),
+    ('motion_rate', 'f8')
+])
+LEGACY_HEADER = "Asteroid_ID,Timestamp,V_Mag,RA_Rate(\"/min),DEC_Rate(\"/min),Motion_Rate(\"/min)\n"
+
+def shard_path(start, end, store_dir=STORE_DIR):
+    """Committed store file for the shard covering catalog indices [start, end)"""
+    return os.path.join(store_dir, SHARDS_SUBDIR, f"shard_{start:06d}_{end:06d}.npy")
+
+def candidates_from_observations(asteroid_id, observations):
+    """Tag an object's observation array with its asteroid ID"""
+    candidates = np.empty(len(observations), dtype=CANDIDATE_DTYPE)
+    candidates['asteroid_id'] = asteroid_id
+    for name in CANDIDATE_DTYPE.names[1:]:
+        candidates[name] = observations[name]
+    return candidates
+
+def save_atomic(path, array):
+    """Write an array to a temporary sibling, fsync it and rename it into place"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array, allow_pickle=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def commit_shard(start, end, candidates, store_dir=STORE_DIR):
+    """Atomically commit one shard's candidates; a rerun replaces the old commit"""
+    path = shard_path(start, end, store_dir)
+    save_atomic(path, np.asarray(candidates, dtype=CANDIDATE_DTYPE))
+    return path
+
+def deduplicate(candidates):
+    """Sort by (asteroid, time) and keep the last row for each (asteroid, timestamp)"""
+    if not len(candidates):
+        return candidates
+    order = np.lexsort((np.arange(len(candidates)), candidates['timestamp'], candidates['asteroid_id']))
+    ordered = candidates[order]
+    last = np.ones(len(ordered), dtype=bool)
+    last[:-1] = (ordered['asteroid_id'][1:] != ordered['asteroid_id'][:-1]) | \
+                (ordered['timestamp'][1:] != ordered['timestamp'][:-1])
+    unique = ordered[last]
+    return unique[np.lexsort((unique['jd'], unique['asteroid_id']))]
+
+def compact_store(store_dir=STORE_DIR):
+    """Merge all committed shards into one de-duplicated candidate table
+
+    Shards are read in commit order so that, for duplicate rows, the most
+    recently committed values win. The result is written atomically.
+    """
+    paths = sorted(glob.glob(os.path.join(store_dir, SHARDS_SUBDIR, "shard_*.npy")),
+                   key=os.path.getmtime)
+    parts = [np.load(path, allow_pickle=False) for path in paths]
+    candidates = np.concatenate(parts) if parts else np.empty(0, dtype=CANDIDATE_DTYPE)
+    n_rows = len(candidates)
+    candidates = deduplicate(candidates)
+    save_atomic(os.path.join(store_dir, COMPACT_FILE), candidates)
+    print(f"🗜️ Compacted {len(paths)} shards: {n_rows} rows -> {len(candidates)} unique candidates")
+    return candidates
+
+def merge_candidates(candidates, replaced_ids, store_dir=STORE_DIR):
+    """Replace the rows of some objects in the store with freshly swept ones
+
+    Every row of replaced_ids is dropped before the new candidates are
+    added, so objects whose orbit changed lose their stale rows. The merged
+    table becomes the store's single base shard and is compacted; the old
+    shard commits are removed only after the base is safely in place.
+    """
+    if os.path.exists(os.path.join(store_dir, COMPACT_FILE)):
+        current = load_candidates(store_dir, mmap=False)
+    else:
+        current = compact_store(store_dir)
+    keep = ~np.isin(current['asteroid_id'], np.asarray(list(replaced_ids), dtype="U12"))
+    merged = deduplicate(np.concatenate([current[keep], np.asarray(candidates, dtype=CANDIDATE_DTYPE)]))
+
+    base = os.path.join(store_dir, SHARDS_SUBDIR, BASE_SHARD)
+    save_atomic(base, merged)
+    for path in glob.glob(os.path.join(store_dir, SHARDS_SUBDIR, "shard_*.npy")):
+        if path != base:
+            os.remove(path)
+    save_atomic(os.path.join(store_dir, COMPACT_FILE), merged)
+    print(f"🔀 Merged {len(candidates)} rows for {len(replaced_ids)} replaced objects: "
+          f"{len(current)} -> {len(merged)} candidates")
+    return merged
+
+def load_candidates(store_dir=STORE_DIR, mmap=True):
+    """Open the compacted candidate table (memory-mapped by default)"""
+    return np.load(os.path.join(store_dir, COMPACT_FILE), mmap_mode="r" if mmap else None,
+                   allow_pickle=False)
+
+def export_text(candidates, path):
+    """Write candidates in the legacy all_valid_asteroids.txt CSV layout"""
+    with open(path, "w") as f:
+        f.write(LEGACY_HEADER)
+        for row in candidates:
+            f.write(
+                f"{row['asteroid_id']},"
+                f"{row['timestamp']},"
+                f"{row['v_mag']:.2f},"
+                f"{row['ra_rate']:.2f},"
+                f"{row['dec_rate']:.2f},"
+                f"{row['motion_rate']:.2f}\n"
+            )
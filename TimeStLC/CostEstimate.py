@@ -0,0 +1,252 @@
+import os
+import re
+import sys
+import glob
+import numpy as np
+
+from EphemerisCache import CACHE_FILE, EphemerisCache
+from LeanHorizons import LEAN_QUANTITIES
+from MPCCatalog import load_catalog
+from ObservingWindows import load_windows
+from StageTimings import timing_stats
+from SweepJournal import read_journal_entries
+from SweepEngine import JOURNAL_DIR, select_candidates, worker_options
+
+# The image stage's download limits live with its code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "ImagesStLc"))
+from FrameDownloads import DOWNLOAD_WORKERS, PER_HOST_LIMIT
+
+# Image-stage outputs, relative to where the image and FWHM stages run
+MOST_OUTPUT_DIR = os.environ.get("STLC_MOST_OUTPUT", "mostoutput")
+CUTOUTS_DIR = os.environ.get("STLC_CUTOUTS", "cutouts")
+FRAME_WORKERS = min(DOWNLOAD_WORKERS, PER_HOST_LIMIT)  # Concurrent frame downloads, all from one IRSA host
+
+# Fallbacks until stage_timings.jsonl and earlier outputs provide measurements
+DEFAULT_SECONDS = {'horizons_sweep': 4.0, 'horizons_vectors': 4.0, 'most': 10.0, 'frame': 5.0}
+DEFAULT_BYTES = {'most': 300e3, 'frame': 7e6}
+DEFAULT_FRAMES_PER_DAY = 3.0
+DEFAULT_CUTOUT_BYTES = 150e3
+METADATA_BYTES = 400  # The .fits.fz.txt written next to each frame
+
+def format_bytes(n_bytes):
+    """Human-readable byte count"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if n_bytes < 1024:
+            return f"{n_bytes:.1f} {unit}"
+        n_bytes /= 1024
+    return f"{n_bytes:.1f} TB"
+
+def format_duration(seconds):
+    """Human-readable duration"""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m {seconds}s"
+
+def measured(stats, stage, field, default):
+    """A measured median from the timing log, or the default, and where it came from"""
+    value = stats.get(stage, {}).get(field)
+    if value is None:
+        return default, "default"
+    return value, f"median of {stats[stage]['n']}"
+
+def retry_factor(journal_dir=JOURNAL_DIR):
+    """Mean attempts per queried object in the last sweep's journals (1.0 without history)"""
+    attempts = [
+        entry['attempts']
+        for path in glob.glob(os.path.join(journal_dir, "*.jsonl"))
+        for entry in read_journal_entries(path).values()
+        if entry['attempts']
+    ]
+    return float(np.mean(attempts)) if attempts else 1.0
+
+def sweep_catalog(catalog, options):
+    """Catalog rows the sweep would shard, after the delta diff"""
+    if options.get('delta'):
+        from DeltaSweep import load_swept_catalog, diff_catalog
+        swept = load_swept_catalog()
+        if swept is not None:
+            new, changed, _ = diff_catalog(swept, catalog)
+            catalog = catalog[new | changed]
+    return catalog
+
+def sweep_targets(objects, options, cache_path=CACHE_FILE):
+    """Horizons target of each object as the sweep queries and caches it, and the lookups still needed
+
+    Without --resolve-ids the target is the catalog designation. With it,
+    stored resolutions are used without contacting Horizons: objects that
+    failed to resolve are not queried (None), and designations not yet
+    resolved cost one lookup and are queried under their Horizons command.
+    """
+    designations = objects['designation'].tolist()
+    if not options['resolve_ids']:
+        return designations, 0
+    from Designations import IdResolver, horizons_command, unpack_designations
+    known = IdResolver(cache_path).lookup(designations) if os.path.exists(cache_path) else {}
+    pending = [designation for designation in designations if designation not in known]
+    commands = dict(zip(pending, (horizons_command(name) for name in unpack_designations(pending))))
+    targets = [known[designation][0] if designation in known else commands[designation]
+               for designation in designations]
+    return targets, len(pending)
+
+def sweep_estimate(catalog, options, stats, cache_path=CACHE_FILE):
+    """Horizons requests the sweep still needs, given the shared ephemeris cache
+
+    Adaptive refinement queries depend on the coarse results and are not
+    counted. Request time is the median of past sweep queries only (state
+    vector queries with --vectors), not of refinement or single-epoch ones.
+    """
+    sharded = sweep_catalog(catalog, options)
+    objects = sharded[select_candidates(sharded, options)]
+    targets, n_lookups = sweep_targets(objects, options, cache_path)
+    objects = objects[np.array([target is not None for target in targets], dtype=bool)]
+    targets = [target for target in targets if target is not None]
+    epochs = {'start': options['start_date'], 'stop': options['end_date'], 'step': "1d"}
+    location, quantities = options['location'], None
+    if options['vectors']:
+        from LocalEphemeris import vector_epochs
+        location, quantities = "@sun", "vectors:earth"
+        epochs = vector_epochs(options['start_date'], options['end_date'])
+    elif options['lean']:
+        quantities = f"lean:{LEAN_QUANTITIES}"
+
+    n_cached = 0
+    if options['use_cache'] and os.path.exists(cache_path):
+        cache = EphemerisCache(cache_path)
+        n_cached = sum(
+            cache.contains(target, location, epochs, quantities, key)
+            for target, key in zip(targets, objects['orbit_key'].tolist())
+        )
+    n_requests = len(objects) - n_cached
+    if options['vectors'] and n_requests:
+        n_requests += 1  # The Earth's vectors, shared by every object
+    n_requests += n_lookups
+
+    stage = 'horizons_vectors' if options['vectors'] else 'horizons_sweep'
+    seconds, source = measured(stats, stage, 'seconds', DEFAULT_SECONDS[stage])
+    retries = retry_factor(options['journal_dir'])
+    n_shards = -(-len(sharded) // options['shard_size'])
+    n_workers = max(1, min(options['workers'], n_shards))  # As run_shards starts them
+    shares = worker_options(options, n_workers)
+    parallel = n_workers * (shares['concurrency'] if options['async_fetch'] else 1)
+    wall = n_requests * retries * seconds / parallel
+    if options['async_fetch'] and options['rate']:
+        wall = max(wall, n_requests * retries / options['rate'])  # --rate is the sweep-wide limit
+    return {
+        'n_catalog': len(catalog), 'n_queried': len(objects), 'n_cached': n_cached,
+        'n_lookups': n_lookups,
+        'n_requests': n_requests, 'retries': retries, 'seconds': seconds, 'source': source,
+        'parallel': parallel, 'wall': wall
+    }
+
+def run_directories(windows, most_dir=MOST_OUTPUT_DIR):
+    """Output directory and HTML page of each window, numbered as the image stage numbers runs"""
+    order = np.lexsort((windows['start_jd'], windows['asteroid_id']))
+    ids = windows['asteroid_id'][order]
+    first = np.r_[True, ids[1:] != ids[:-1]]
+    positions = np.arange(len(order))
+    run_numbers = np.empty(len(order), dtype=int)
+    run_numbers[order] = positions - np.maximum.accumulate(np.where(first, positions, 0)) + 1
+
+    runs = []
+    for row, run_number in zip(windows, run_numbers):
+        name = str(row['asteroid_id']).replace(" ", "_")
+        run_id = f"OB{run_number}_{row['start'].replace('-', '')}_{row['end'].replace('-', '')}"
+        run_dir = os.path.join(most_dir, name, run_id)
+        runs.append((run_dir, os.path.join(run_dir, f"{name}_{run_id}.html")))
+    return runs
+
+def count_frames(html_file):
+    """Difference frames a saved MOST page lists"""
+    with open(html_file, encoding="utf-8", errors="replace") as f:
+        return len(re.findall(r'href="[^"]*sciimg\.fits', f.read()))
+
+def mean_file_size(pattern, default):
+    """Mean size of the files matching a glob pattern, or the default when there are none"""
+    sizes = [os.path.getsize(path) for path in glob.glob(pattern, recursive=True)]
+    return (float(np.mean(sizes)), f"mean of {len(sizes)}") if sizes else (default, "default")
+
+def image_estimate(windows, stats, most_dir=MOST_OUTPUT_DIR, cutouts_dir=CUTOUTS_DIR):
+    """MOST queries, frames, bytes and time the image and cutout stages still need
+
+    Windows whose MOST page is already saved count the frames it lists;
+    the rest are predicted from the frames per window-day of saved pages.
+    """
+    days = (windows['end'].astype("datetime64[D]")
+            - windows['start'].astype("datetime64[D]")).astype(int) + 1
+    runs = run_directories(windows, most_dir)
+    saved = np.array([os.path.exists(html_file) for _, html_file in runs], dtype=bool)
+    listed = np.array([count_frames(html_file) if done else 0
+                       for (_, html_file), done in zip(runs, saved)])
+    downloaded = np.array([len(glob.glob(os.path.join(run_dir, "observation_images", "*.fits.fz")))
+                           if done else 0 for (run_dir, _), done in zip(runs, saved)])
+
+    frames_per_day, frames_source = DEFAULT_FRAMES_PER_DAY, "default"
+    if saved.any() and days[saved].sum():
+        frames_per_day = listed[saved].sum() / days[saved].sum()
+        frames_source = f"{saved.sum()} saved pages"
+    n_frames = float(np.maximum(listed - downloaded, 0).sum() + frames_per_day * days[~saved].sum())
+    n_queries = int(np.count_nonzero(~saved))
+
+    frame_bytes, bytes_source = measured(stats, 'frame', 'bytes', None)
+    if frame_bytes is None:
+        frame_bytes, bytes_source = mean_file_size(os.path.join(most_dir, "**", "*.fits.fz"),
+                                                   DEFAULT_BYTES['frame'])
+    page_bytes, _ = measured(stats, 'most', 'bytes', DEFAULT_BYTES['most'])
+    cutout_bytes, _ = mean_file_size(os.path.join(cutouts_dir, "**", "*.png"), DEFAULT_CUTOUT_BYTES)
+    most_seconds, most_source = measured(stats, 'most', 'seconds', DEFAULT_SECONDS['most'])
+    frame_seconds, frame_source = measured(stats, 'frame', 'seconds', DEFAULT_SECONDS['frame'])
+    return {
+        'n_windows': len(windows), 'n_queries': n_queries, 'n_saved': int(saved.sum()),
+        'n_frames': n_frames, 'frames_per_day': frames_per_day, 'frames_source': frames_source,
+        'frame_bytes': frame_bytes, 'bytes_source': bytes_source,
+        'download_bytes': n_frames * frame_bytes + n_queries * page_bytes,
+        'most_disk': n_frames * (frame_bytes + METADATA_BYTES) + n_queries * page_bytes,
+        'cutouts_disk': n_frames * cutout_bytes,
+        'most_seconds': most_seconds, 'most_source': most_source,
+        'frame_seconds': frame_seconds, 'frame_source': frame_source,
+        'wall': n_queries * most_seconds + n_frames * frame_seconds / FRAME_WORKERS
+    }
+
+def dry_run(options):
+    """Print the expected requests, bytes, disk and wall-clock time of a full pipeline run"""
+    try:
+        catalog = load_catalog()
+    except OSError:
+        print("No local NEA catalog snapshot; run the sweep once (or MPCCatalog) to download it")
+        return None
+    stats = timing_stats()
+    sweep = sweep_estimate(catalog, options, stats)
+    print(f"🧮 Dry run for {options['start_date']} .. {options['end_date']} at {options['location']}")
+    print(f"Sweep: {sweep['n_queried']} of {sweep['n_catalog']} objects queried, "
+          f"{sweep['n_cached']} already cached")
+    print(f"  Horizons requests: {sweep['n_requests']}"
+          + (f" incl. {sweep['n_lookups']} ID lookups" if sweep['n_lookups'] else "")
+          + f" (x{sweep['retries']:.2f} attempts), "
+          f"{sweep['seconds']:.1f} s each ({sweep['source']}), {sweep['parallel']} in parallel")
+    print(f"  Wall clock: {format_duration(sweep['wall'])}")
+
+    try:
+        windows = load_windows(options['store_dir'])
+    except OSError:
+        print(f"Image stage: no window table in {options['store_dir']} yet; "
+              f"the sweep has to run before MOST and downloads can be sized")
+        return {'sweep': sweep, 'images': None}
+    images = image_estimate(windows, stats)
+    print(f"MOST: {images['n_queries']} queries for {images['n_windows']} windows "
+          f"({images['n_saved']} pages already saved), {images['most_seconds']:.1f} s each "
+          f"({images['most_source']})")
+    print(f"Frames: ~{images['n_frames']:.0f} to download, {images['frames_per_day']:.2f} per window-day "
+          f"({images['frames_source']}), {format_bytes(images['frame_bytes'])} each "
+          f"({images['bytes_source']}), {images['frame_seconds']:.1f} s each ({images['frame_source']}), "
+          f"{FRAME_WORKERS} in parallel")
+    print(f"  Download: {format_bytes(images['download_bytes'])}")
+    print(f"  Disk: {format_bytes(images['most_disk'])} under {MOST_OUTPUT_DIR}/, "
+          f"{format_bytes(images['cutouts_disk'])} under {CUTOUTS_DIR}/")
+    print(f"  Wall clock: {format_duration(images['wall'])}")
+    print(f"Total wall clock: {format_duration(sweep['wall'] + images['wall'])}")
+    return {'sweep': sweep, 'images': images}
@@ -0,0 +1,105 @@
+import os
+import shutil
+import numpy as np
+
+from MPCCatalog import MPC_URL, refresh_catalog, load_catalog
+from CandidateStore import CANDIDATE_DTYPE, compact_store, merge_candidates, export_text
+from ObservingWindows import windows_from_candidates, save_windows
+from WindowIndex import save_index
+from SweepJournal import journal_path, write_dead_letter
+from SweepEngine import (SHARD_DIR, SWEPT_FILE, build_manifest, select_candidates, resolve_targets,
+                         run_shards, verify_coverage, catalog_magnitudes, save_swept_catalog)
+
+# Working area of an incremental sweep, rebuilt on every run
+DELTA_DIR = os.path.join(SHARD_DIR, "delta")
+DELTA_JOURNAL_DIR = os.path.join(DELTA_DIR, "journal")
+DELTA_STORE_DIR = os.path.join(DELTA_DIR, "store")
+DELTA_DEAD_LETTER_FILE = os.path.join(DELTA_DIR, "dead_letter.jsonl")
+
+def load_swept_catalog(path=SWEPT_FILE):
+    """Designations and orbit keys of the last completed sweep, or None"""
+    try:
+        return np.load(path, allow_pickle=False)
+    except OSError:
+        return None
+
+def diff_catalog(swept, catalog):
+    """Compare the current catalog with the swept one by designation and orbit key
+
+    Returns boolean masks over the current catalog for new and changed
+    objects, and the designations that have left the catalog.
+    """
+    order = np.argsort(swept['designation'])
+    known = swept['designation'][order]
+    designations = np.asarray(catalog['designation'])
+    pos = np.clip(np.searchsorted(known, designations), 0, max(len(known) - 1, 0))
+    found = known[pos] == designations if len(known) else np.zeros(len(designations), dtype=bool)
+    new = ~found
+    changed = found & (swept['orbit_key'][order][pos] != np.asarray(catalog['orbit_key']))
+    removed = swept['designation'][~np.isin(swept['designation'], designations)]
+    return new, changed, removed
+
+def run_delta(options):
+    """Sweep only new and changed objects and merge them into the candidate store"""
+    try:
+        refresh_catalog(MPC_URL)
+        catalog = load_catalog()
+    except Exception as e:
+        print(f"Error fetching MPC data: {e}")
+        return False
+    swept = load_swept_catalog()
+    if swept is None:
+        print(f"No completed sweep recorded in {SWEPT_FILE}; run a full sweep first")
+        return False
+
+    new, changed, removed = diff_catalog(swept, catalog)
+    delta = np.flatnonzero(new | changed)
+    print(f"Catalog delta: {np.count_nonzero(new)} new, {np.count_nonzero(changed)} changed, "
+          f"{len(removed)} removed of {len(catalog)} objects")
+
+    shutil.rmtree(DELTA_DIR, ignore_errors=True)
+    failed = np.zeros(len(delta), dtype=bool)
+    candidates = np.empty(0, dtype=CANDIDATE_DTYPE)
+    if len(delta):
+        subset = catalog[delta]
+        asteroid_ids = subset['designation'].tolist()
+        selected = select_candidates(subset, options)
+        targets = None
+        if options['resolve_ids']:
+            targets = resolve_targets(asteroid_ids, selected)
+        manifest = build_manifest(asteroid_ids, options['shard_size'], subset['orbit_key'].tolist(),
+                                  selected, targets, DELTA_STORE_DIR, catalog_magnitudes(subset))
+
+        delta_options = dict(options, replay=frozenset(), journal_dir=DELTA_JOURNAL_DIR,
+                             store_dir=DELTA_STORE_DIR)
+        results = run_shards(manifest, delta_options)
+        dead = write_dead_letter([journal_path(shard['start'], shard['end'], DELTA_JOURNAL_DIR)
+                                  for shard in manifest['shards']], DELTA_DEAD_LETTER_FILE)
+        if dead:
+            print(f"⚠️ {len(dead)} objects failed permanently; see {DELTA_DEAD_LETTER_FILE}")
+        missing, duplicated = verify_coverage(manifest, results)
+        failed[missing] = True
+        failed[[entry['index'] for entry in dead]] = True  # Covered, but no new rows to replace the old
+        candidates = compact_store(DELTA_STORE_DIR)
+
+    # Objects that failed, transiently or permanently, keep their old rows and old orbit key,
+    # so the next delta retries them
+    replaced = set(catalog['designation'][delta[~failed]].tolist()) | set(removed.tolist())
+    merged = merge_candidates(candidates, replaced, options['store_dir'])
+    windows = windows_from_candidates(merged)
+    save_windows(windows, options['store_dir'])
+    save_index(windows, options['store_dir'])
+
+    keys = np.asarray(catalog['orbit_key']).copy()
+    retry = delta[failed]
+    previous = dict(zip(swept['designation'].tolist(), swept['orbit_key'].tolist()))
+    keys[retry] = [previous.get(designation, "") for designation in catalog['designation'][retry]]
+    kept = np.ones(len(catalog), dtype=bool)
+    kept[retry[new[retry]]] = False  # New objects that failed stay new
+    save_swept_catalog(catalog['designation'][kept], keys[kept])
+
+    export_text(merged, options['master_file'])
+    if failed.any():
+        print(f"{np.count_nonzero(failed)} objects could not be swept; the next --delta retries them")
+    print(f"Delta sweep complete. Data saved to {options['store_dir']}/ and {options['master_file']}")
+    return not failed.any()
@@ -0,0 +1,185 @@
+import re
+import time
+import sqlite3
+import numpy as np
+from astroquery.jplhorizons import Horizons
+from concurrent.futures import ThreadPoolExecutor
+
+from EphemerisCache import CACHE_FILE, BUSY_TIMEOUT
+
+# Packed-designation alphabet: 0-9, A-Z (10-35), a-z (36-61)
+PACKED_DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+SURVEYS = {"PL": "P-L", "T1": "T-1", "T2": "T-2", "T3": "T-3"}
+RESOLVE_EPOCH = 2451545.0  # Single epoch used to probe a Horizons target
+RESOLVE_WORKERS = 8  # Concurrent lookups when resolving new designations
+
+def _digit_values(codes):
+    """Map byte codes of packed digits to their values (-1 where invalid)"""
+    lookup = np.full(256, -1, dtype=np.int64)
+    lookup[np.frombuffer(PACKED_DIGITS.encode(), dtype=np.uint8)] = np.arange(len(PACKED_DIGITS))
+    return lookup[codes]
+
+def _is_digit(codes):
+    """Element-wise test for ASCII decimal digits"""
+    return (codes >= ord("0")) & (codes <= ord("9"))
+
+def _is_upper(codes):
+    """Element-wise test for ASCII upper-case letters"""
+    return (codes >= ord("A")) & (codes <= ord("Z"))
+
+def unpack_designations(packed):
+    """Vectorized conversion of MPC packed designations to unpacked form
+
+    Handles numbered objects ('00433' -> '433', 'A0345' -> '100345',
+    '~0000' -> '620000'), provisional designations ('K24A01B' -> '2024 AB1')
+    and survey designations ('PLS2040' -> '2040 P-L'). Unrecognised entries
+    are returned unchanged.
+    """
+    packed = np.char.strip(np.asarray(packed, dtype="U7"))
+    out = packed.astype(object)
+    if not packed.size:
+        return packed
+    codes = np.char.ljust(packed, 7).astype("S7").view(np.uint8).reshape(-1, 7).astype(np.int64)
+    values = _digit_values(codes)
+    lengths = np.char.str_len(packed)
+    digit = _is_digit(codes)
+
+    # Numbered: one packed digit followed by four decimal digits
+    numbered = (lengths == 5) & (values[:, 0] >= 0) & digit[:, 1:5].all(axis=1)
+    number = values[:, 0] * 10000 + (codes[:, 1:5] - ord("0")) @ np.array([1000, 100, 10, 1])
+    out[numbered] = number[numbered].astype(str)
+
+    # Extended numbering beyond 619999: '~' followed by four base-62 digits
+    extended = (lengths == 5) & (codes[:, 0] == ord("~")) & (values[:, 1:5] >= 0).all(axis=1)
+    ext_number = 620000 + values[:, 1:5] @ np.array([62**3, 62**2, 62, 1])
+    out[extended] = ext_number[extended].astype(str)
+
+    # Survey designations: PLS2040, T1S3138, ...
+    survey = (lengths == 7) & np.isin(np.asarray(packed, dtype="U2"), list(SURVEYS)) \
+        & (codes[:, 2] == ord("S")) & digit[:, 3:7].all(axis=1)
+    for i in np.flatnonzero(survey):
+        out[i] = f"{packed[i][3:]} {SURVEYS[packed[i][:2]]}"
+
+    # Provisional: century letter, 2-digit year, half-month, packed cycle, second letter
+    provisional = (
+        (lengths == 7) & np.isin(codes[:, 0], [ord("I"), ord("J"), ord("K")])
+        & digit[:, 1] & digit[:, 2] & _is_upper(codes[:, 3])
+        & (values[:, 4] >= 0) & digit[:, 5] & _is_upper(codes[:, 6])
+    )
+    year = values[:, 0] * 100 + (codes[:, 1] - ord("0")) * 10 + codes[:, 2] - ord("0")
+    cycle = values[:, 4] * 10 + codes[:, 5] - ord("0")
+    for i in np.flatnonzero(provisional):
+        letters = chr(codes[i, 3]) + chr(codes[i, 6])
+        out[i] = f"{year[i]} {letters}{cycle[i] if cycle[i] else ''}"
+
+    return out.astype(str)
+
+def pack_designation(name):
+    """Convert one unpacked designation ('2024 AB1', '433') to packed form"""
+    name = name.strip()
+    if name.isdigit():
+        number = int(name)
+        if number < 620000:
+            return PACKED_DIGITS[number // 10000] + f"{number % 10000:04d}"
+        rest, digits = number - 620000, ""
+        for _ in range(4):
+            rest, d = divmod(rest, 62)
+            digits = PACKED_DIGITS[d] + digits
+        return "~" + digits
+
+    match = re.fullmatch(r"(\d{4}) (P-L|T-1|T-2|T-3)", name)
+    if match:
+        survey = {v: k for k, v in SURVEYS.items()}[match.group(2)]
+        return f"{survey}S{match.group(1)}"
+
+    match = re.fullmatch(r"(\d{2})(\d{2}) ([A-Z])([A-Z])(\d*)", name)
+    if match:
+        century, year, half_month, letter, cycle = match.groups()
+        cycle = int(cycle or 0)
+        return (PACKED_DIGITS[int(century)] + year + half_month
+                + PACKED_DIGITS[cycle // 10] + str(cycle % 10) + letter)
+    return name
+
+def pack_designations(names):
+    """Convert many unpacked designations to packed form"""
+    return np.array([pack_designation(str(name)) for name in names], dtype="U7")
+
+def horizons_command(unpacked):
+    """Unambiguous Horizons small-body command for an unpacked designation"""
+    if unpacked.isdigit():
+        return f"{unpacked};"  # Asteroid number
+    return f"DES={unpacked};"  # Provisional or survey designation
+
+class IdResolver:
+    """Persistent map from MPC designation to a verified Horizons target
+
+    Stored next to the ephemeris cache. Designations are looked up at
+    Horizons once; later runs reuse the stored target or failure reason.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS horizons_ids ("
+            " designation TEXT PRIMARY KEY,"
+            " horizons_id TEXT,"
+            " status TEXT NOT NULL,"
+            " detail TEXT,"
+            " resolved REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def lookup(self, designations):
+        """Stored (horizons_id, status, detail) for the designations already resolved"""
+        known = {}
+        for start in range(0, len(designations), 500):
+            batch = list(designations[start:start + 500])
+            rows = self.conn.execute(
+                f"SELECT designation, horizons_id, status, detail FROM horizons_ids "
+                f"WHERE designation IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            known.update({row[0]: row[1:] for row in rows})
+        return known
+
+    def store(self, results):
+        """Persist resolution results (designation, horizons_id, status, detail)"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO horizons_ids VALUES (?, ?, ?, ?, ?)",
+                [(*result, time.time()) for result in results]
+            )
+
+def probe_target(designation, command):
+    """Check one Horizons command resolves to exactly one body"""
+    try:
+        Horizons(id=command, location="500", epochs=RESOLVE_EPOCH).ephemerides(quantities="1")
+        return designation, command, "ok", None
+    except ValueError as e:
+        message = str(e)
+        if "Ambiguous" in message or "Multiple" in message:
+            return designation, None, "ambiguous", message.splitlines()[0]
+        if "Unknown" in message or "No matches" in message:
+            return designation, None, "not_found", message.splitlines()[0]
+        return designation, None, "error", message.splitlines()[0] if message else repr(e)
+    except Exception as e:
+        return designation, None, "error", str(e)
+
+def resolve_designations(designations, workers=RESOLVE_WORKERS, path=CACHE_FILE):
+    """Resolve packed designations to Horizons targets, probing only new ones
+
+    Returns {designation: (horizons_id or None, status, detail)}. Transient
+    errors are returned but not stored, so they are retried next time.
+    """
+    resolver = IdResolver(path)
+    designations = list(designations)
+    resolved = resolver.lookup(designations)
+    pending = [d for d in designations if d not in resolved]
+    if pending:
+        commands = [horizons_command(name) for name in unpack_designations(pending)]
+        print(f"🔎 Resolving {len(pending)} new designations at Horizons")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(probe_target, pending, commands))
+        resolver.store([r for r in results if r[2] != "error"])
+        resolved.update({r[0]: r[1:] for r in results})
+    return resolved
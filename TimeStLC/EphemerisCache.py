@@ -0,0 +1,216 @@
+import io
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from astropy.table import Table
+from astroquery.jplhorizons import Horizons
+
+from LeanHorizons import LEAN_QUANTITIES, lean_ephemerides
+from StageTimings import StageTimer
+
+# Cache configuration
+CACHE_FILE = os.environ.get(  # Shared by the sweep and the FWHM stage
+    "STLC_EPHEM_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "ephemeris_cache.sqlite")
+)
+BUSY_TIMEOUT = 60  # Seconds a writer waits for the database lock
+
+_local = threading.local()
+
+def orbit_key(catalog_line):
+    """Hash the epoch and osculating elements of an MPCORB/NEA.txt line
+
+    Any change in the orbit solution (new epoch or refined elements) gives
+    a new key, which invalidates ephemerides cached under the old one.
+    """
+    return hashlib.sha1(catalog_line[20:103].encode()).hexdigest()[:16]
+
+def query_key(target, location, epochs, quantities):
+    """Stable key for one Horizons request"""
+    request = {
+        'target': str(target),
+        'location': str(location),
+        'epochs': epochs,
+        'quantities': quantities
+    }
+    return hashlib.sha1(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+def table_to_blob(table):
+    """Serialize an ephemeris table (values, mask and units) without pickling
+
+    Plain structured arrays (lean queries) are stored as-is, without units.
+    """
+    if isinstance(table, np.ndarray):
+        array, units = table, {}
+    else:
+        array = table.as_array()
+        units = {name: str(table[name].unit or "") for name in table.colnames}
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        data=np.ma.getdata(array),
+        mask=np.ma.getmaskarray(array) if np.ma.isMaskedArray(array) else np.zeros(0),
+        units=np.array(json.dumps(units))
+    )
+    return buffer.getvalue()
+
+def blob_to_table(blob, as_table=True):
+    """Rebuild an ephemeris table written by table_to_blob
+
+    Without as_table the stored structured array is returned directly.
+    """
+    with np.load(io.BytesIO(blob), allow_pickle=False) as npz:
+        data = npz['data']
+        mask = npz['mask']
+        units = json.loads(str(npz['units']))
+    if not as_table:
+        return data
+    if mask.size:
+        table = Table(np.ma.MaskedArray(data, mask=mask), masked=True)
+    else:
+        table = Table(data)
+    for name, unit in units.items():
+        if unit and name in table.colnames:
+            table[name].unit = unit
+    return table
+
+class EphemerisCache:
+    """On-disk SQLite cache of Horizons ephemeris tables
+
+    Entries are keyed on target, location, epochs and quantities and carry
+    the orbit key they were computed from. The database runs in WAL mode so
+    many worker processes can read while one writes.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ephemerides ("
+            " key TEXT PRIMARY KEY,"
+            " target TEXT NOT NULL,"
+            " location TEXT NOT NULL,"
+            " orbit_key TEXT,"
+            " created REAL NOT NULL,"
+            " payload BLOB NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ephemerides_target ON ephemerides (target)")
+        self.conn.commit()
+
+    def get(self, target, location, epochs, quantities=None, orbit_key=None, as_table=True):
+        """Return the cached table, or None on a miss or a stale orbit solution"""
+        row = self.conn.execute(
+            "SELECT orbit_key, payload FROM ephemerides WHERE key = ?",
+            (query_key(target, location, epochs, quantities),)
+        ).fetchone()
+        if row is None:
+            return None
+        if orbit_key is not None and row[0] != orbit_key:
+            self.invalidate(target, keep_orbit_key=orbit_key)
+            return None
+        return blob_to_table(row[1], as_table)
+
+    def contains(self, target, location, epochs, quantities=None, orbit_key=None):
+        """Whether get() would hit, without loading or invalidating the entry"""
+        row = self.conn.execute(
+            "SELECT orbit_key FROM ephemerides WHERE key = ?",
+            (query_key(target, location, epochs, quantities),)
+        ).fetchone()
+        return row is not None and (orbit_key is None or row[0] == orbit_key)
+
+    def put(self, target, location, epochs, quantities, table, orbit_key=None):
+        """Store one ephemeris table"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ephemerides VALUES (?, ?, ?, ?, ?, ?)",
+                (query_key(target, location, epochs, quantities), str(target), str(location),
+                 orbit_key, time.time(), table_to_blob(table))
+            )
+
+    def invalidate(self, target, keep_orbit_key=None):
+        """Drop a target's entries, except those computed from keep_orbit_key"""
+        with self.conn:
+            if keep_orbit_key is None:
+                self.conn.execute("DELETE FROM ephemerides WHERE target = ?", (str(target),))
+            else:
+                self.conn.execute(
+                    "DELETE FROM ephemerides WHERE target = ? AND orbit_key IS NOT ?",
+                    (str(target), keep_orbit_key)
+                )
+
+def get_cache(path=CACHE_FILE):
+    """Return this thread's connection to the cache, reopening after a fork"""
+    cache = getattr(_local, "cache", None)
+    if cache is None or cache.path != path or getattr(_local, "pid", None) != os.getpid():
+        cache = EphemerisCache(path)
+        _local.cache = cache
+        _local.pid = os.getpid()
+    return cache
+
+def cached_ephemerides(target, location, epochs, quantities=None, orbit_key=None,
+                       session=None, cache_path=CACHE_FILE, lean=False, stage="horizons"):
+    """Horizons ephemerides served from the shared cache when possible
+
+    With lean only V, RA/DEC rates and timestamps are requested and parsed
+    straight into a structured array (LeanHorizons); quantities is ignored.
+    Requests that miss the cache are timed under stage, so requests of very
+    different sizes (sweep ranges, refinement intervals, single epochs) keep
+    separate medians.
+    """
+    if lean:
+        quantities = f"lean:{LEAN_QUANTITIES}"  # Separate cache entries from full tables
+    cache = get_cache(cache_path)
+    table = cache.get(target, location, epochs, quantities, orbit_key, as_table=not lean)
+    if table is not None:
+        return table
+
+    with StageTimer(stage):
+        if lean:
+            table = lean_ephemerides(target, location, epochs, session)
+        else:
+            obj = Horizons(id=target, location=location, epochs=epochs)
+            if session is not None:
+                obj._session = session  # Reuse pooled keep-alive connections
+            if quantities is None:
+                table = obj.ephemerides()
+            else:
+                table = obj.ephemerides(quantities=quantities)
+
+    try:
+        cache.put(target, location, epochs, quantities, table, orbit_key)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"⚠️ Could not cache ephemerides for {target}: {e}")
+    return table
+
+def cached_vectors(target, epochs, orbit_key=None, session=None, center="@sun",
+                   use_cache=True, cache_path=CACHE_FILE, stage="horizons_vectors"):
+    """ICRF (refplane 'earth') state vectors, cached like ephemerides
+
+    Epochs of a vectors table are TDB. Entries are stored under their own
+    quantities key, so they never collide with observer tables.
+    """
+    quantities = "vectors:earth"
+    cache = get_cache(cache_path) if use_cache else None
+    if cache is not None:
+        table = cache.get(target, center, epochs, quantities, orbit_key)
+        if table is not None:
+            return table
+
+    with StageTimer(stage):
+        obj = Horizons(id=target, location=center, epochs=epochs)
+        if session is not None:
+            obj._session = session  # Reuse pooled keep-alive connections
+        table = obj.vectors(refplane="earth")
+
+    if cache is not None:
+        try:
+            cache.put(target, center, epochs, quantities, table, orbit_key)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"⚠️ Could not cache state vectors for {target}: {e}")
+    return table
@@ -0,0 +1,100 @@
+import requests
+import numpy as np
+
+# Lean Horizons query parameters
+HORIZONS_API = "https://ssd.jpl.nasa.gov/api/horizons.api"
+LEAN_QUANTITIES = "3,9"  # 3: RA/DEC rates, 9: apparent magnitude and surface brightness
+TIMEOUT = 120  # Seconds per request
+
+# Same column names as the astroquery table, so ephemeris_columns accepts either
+LEAN_DTYPE = np.dtype([
+    ('datetime_str', 'U24'),
+    ('datetime_jd', 'f8'),
+    ('RA_rate', 'f8'),  # "/hr (dRA*cosD)
+    ('DEC_rate', 'f8'),  # "/hr
+    ('V', 'f8')
+])
+
+# Horizons CSV header labels for each LEAN_DTYPE field
+HEADER_LABELS = {
+    'datetime_str': ("Date__(UT)__HR:MN",),
+    'datetime_jd': ("Date_________JDUT",),
+    'RA_rate': ("dRA*cosD",),
+    'DEC_rate': ("d(DEC)/dt",),
+    'V': ("APmag", "T-mag")  # Asteroids report APmag, comets T-mag
+}
+
+class MalformedResponse(Exception):
+    """A Horizons response that is truncated or not laid out as expected; worth retrying"""
+
+def lean_params(target, location, epochs, quantities=LEAN_QUANTITIES):
+    """Horizons API parameters for an observer table with only the given quantities"""
+    command = str(target) if str(target).endswith(";") else f"{target};"  # Small-body lookup
+    return {
+        'format': "text",
+        'COMMAND': f"'{command}'",
+        'OBJ_DATA': "NO",
+        'MAKE_EPHEM': "YES",
+        'EPHEM_TYPE': "OBSERVER",
+        'CENTER': f"'{location}'",
+        'START_TIME': f"'{epochs['start']}'",
+        'STOP_TIME': f"'{epochs['stop']}'",
+        'STEP_SIZE': f"'{epochs['step']}'",
+        'QUANTITIES': f"'{quantities}'",
+        'CAL_FORMAT': "BOTH",
+        'CSV_FORMAT': "YES"
+    }
+
+def _float_column(cells):
+    """Parse one CSV column to floats, with 'n.a.' and blanks as NaN"""
+    values = np.char.strip(cells)
+    values[(values == "n.a.") | (values == "")] = "nan"
+    return values.astype(float)
+
+def parse_lean_response(text):
+    """Parse a Horizons CSV observer table straight into a LEAN_DTYPE array
+
+    Only the lines between $$SOE and $$EOE are split; no astropy Table is
+    built. A response without an ephemeris (unknown or ambiguous target,
+    bad epochs) raises ValueError carrying Horizons' message, which decides
+    whether SweepJournal treats it as permanent. A truncated or garbled
+    response raises MalformedResponse, which is always retried.
+    """
+    lines = text.splitlines()
+    if "$$SOE" not in lines:
+        message = " ".join(line.strip() for line in lines if line.strip() and not line.startswith("*"))
+        if not message:
+            raise MalformedResponse("Empty Horizons response")
+        raise ValueError(f"Horizons returned no ephemeris: {message[:500]}")
+    start = lines.index("$$SOE")
+    if "$$EOE" not in lines[start:]:
+        raise MalformedResponse(f"Horizons response ends inside the ephemeris ({len(lines) - start} lines)")
+    end = lines.index("$$EOE", start)
+
+    header = next((line for line in reversed(lines[:start]) if "Date__" in line), None)
+    if header is None:
+        raise MalformedResponse("Horizons response has no column header before $$SOE")
+    labels = [label.strip() for label in header.split(",")]
+    rows = lines[start + 1:end]
+    eph = np.empty(len(rows), dtype=LEAN_DTYPE)
+    if not rows:
+        return eph
+
+    cells = np.array([row.split(",") for row in rows])
+    for name, candidates in HEADER_LABELS.items():
+        column = next((labels.index(label) for label in candidates if label in labels), None)
+        if column is None:
+            raise MalformedResponse(f"Horizons response has no {name} column: {header.strip()}")
+        if name == 'datetime_str':
+            eph[name] = np.char.strip(cells[:, column])
+        else:
+            eph[name] = _float_column(cells[:, column])
+    return eph
+
+def lean_ephemerides(target, location, epochs, session=None, quantities=LEAN_QUANTITIES):
+    """Fetch V, RA/DEC rates and timestamps only, as a LEAN_DTYPE array"""
+    http = session if session is not None else requests
+    response = http.get(HORIZONS_API, params=lean_params(target, location, epochs, quantities),
+                        timeout=TIMEOUT)
+    response.raise_for_status()
+    return parse_lean_response(response.text)
@@ -0,0 +1,209 @@
+import os
+import argparse
+import requests
+import numpy as np
+import astropy.units as u
+from astropy.time import Time
+from astropy.coordinates import EarthLocation
+
+from EphemerisCache import cached_vectors
+from MPCCatalog import CATALOG_DIR
+from Prefilter import hg_magnitude, ARCSEC_PER_RAD
+from SweepEngine import OBSERVATION_DTYPE, START_DATE, END_DATE, passes_cuts
+
+# Local apparent-quantity parameters
+EARTH_ID = "399"  # Horizons major-body ID of the Earth
+SPEED_OF_LIGHT = 173.1446326846693  # AU/day
+LIGHT_TIME_ITERATIONS = 2
+EARTH_RADIUS_KM = 6378.137  # MPC parallax constants are in units of the equatorial radius
+
+# MPC observatory codes: (east longitude deg, rho cos phi', rho sin phi')
+OBSCODES_URL = "https://www.minorplanetcenter.net/iau/lists/ObsCodes.html"
+OBSCODES_FILE = os.path.join(CATALOG_DIR, "ObsCodes.txt")  # Local copy of the full MPC list
+OBSERVATORIES = {  # Used without the MPC list
+    '500': (0.0, 0.0, 0.0),  # Geocentre
+    'I41': (243.14022, 0.836325, 0.546877),  # Palomar Mountain, ZTF
+    '675': (243.13755, 0.836630, 0.546760),  # Palomar Mountain
+    'G96': (249.21128, 0.845111, 0.533614),  # Mt. Lemmon Survey
+    'F51': (203.74409, 0.936241, 0.351543)  # Pan-STARRS 1, Haleakala
+}
+
+_site_states = {}
+_obscodes = None
+
+def parse_obscodes(text):
+    """Parallax constants of every fixed site in the MPC ObsCodes list
+
+    Columns are split on whitespace, since newer codes carry more digits
+    than the nominal fixed widths. Space-based and roving codes have no
+    constants and are left out.
+    """
+    sites = {}
+    for line in text.splitlines():
+        fields = line[3:].split()[:3]
+        try:
+            lon, rho_cos, rho_sin = (float(value) for value in fields)
+        except ValueError:
+            continue
+        sites[line[:3]] = (lon, rho_cos, rho_sin)
+    return sites
+
+def load_obscodes(path=OBSCODES_FILE, url=OBSCODES_URL):
+    """MPC observatory codes, downloaded once into the catalog directory"""
+    global _obscodes
+    if _obscodes is None:
+        if not os.path.exists(path):
+            response = requests.get(url, timeout=60)
+            response.raise_for_status()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(response.text)
+            os.replace(tmp_path, path)
+        with open(path) as f:
+            _obscodes = parse_obscodes(f.read())
+    return _obscodes
+
+def parse_site(code):
+    """Parallax constants for an MPC observatory code or a 'lon,rho_cos,rho_sin' triple"""
+    if code in OBSERVATORIES:
+        return OBSERVATORIES[code]
+    if "," in code:
+        try:
+            lon, rho_cos, rho_sin = (float(value) for value in code.split(","))
+        except ValueError:
+            raise ValueError(f"Malformed site {code!r}; expected 'lon,rho_cos,rho_sin'")
+        return lon, rho_cos, rho_sin
+    try:
+        sites = load_obscodes()
+    except (OSError, requests.RequestException) as e:
+        raise ValueError(f"Observatory code {code!r} is not built in and the MPC list is "
+                         f"unavailable ({e}); pass 'lon,rho_cos,rho_sin' instead")
+    if code not in sites:
+        raise ValueError(f"Unknown or space-based observatory code {code!r}")
+    return sites[code]
+
+def vector_epochs(start_date, end_date, step="1d"):
+    """TDB epochs for a vectors query whose samples fall on the observer tables' UTC grid
+
+    Horizons reads vectors epochs as TDB, which runs about 69 s ahead of
+    UTC. Shifting the start by TDB - UTC (and keeping the span) puts every
+    sample at the UTC instant an observer table would use, so daily samples
+    stay on their UTC date.
+    """
+    start = Time(start_date, scale="utc")
+    span = Time(end_date, scale="utc").jd - start.jd
+    start = start.tdb
+    return {'start': start.iso, 'stop': (start + span * u.day).iso, 'step': step}
+
+def site_states(code, jd):
+    """Geocentric ICRF position (AU) and velocity (AU/day) of a site at TDB JDs, shape (3, n)"""
+    key = (code, jd.size, float(jd[0]), float(jd[-1]))
+    if key not in _site_states:
+        lon, rho_cos, rho_sin = parse_site(code)
+        if rho_cos == 0 and rho_sin == 0:
+            _site_states[key] = (np.zeros((3, jd.size)), np.zeros((3, jd.size)))
+        else:
+            lon = np.radians(lon)
+            location = EarthLocation.from_geocentric(
+                rho_cos * EARTH_RADIUS_KM * np.cos(lon), rho_cos * EARTH_RADIUS_KM * np.sin(lon),
+                rho_sin * EARTH_RADIUS_KM, unit=u.km
+            )
+            position, velocity = location.get_gcrs_posvel(Time(jd, format="jd", scale="tdb"))
+            _site_states[key] = (position.xyz.to_value(u.au), velocity.xyz.to_value(u.au / u.day))
+    return _site_states[key]
+
+def state_columns(table):
+    """Position and velocity columns of a Horizons vectors table, shape (3, n)"""
+    position = np.array([np.asarray(table[name], dtype=float) for name in ("x", "y", "z")])
+    velocity = np.array([np.asarray(table[name], dtype=float) for name in ("vx", "vy", "vz")])
+    return position, velocity
+
+def apparent_quantities(r_obj, v_obj, r_earth, v_earth, sites, jd, H, G):
+    """Apparent RA/Dec, V and sky-motion rates for several sites in one pass
+
+    r_obj/v_obj and r_earth/v_earth are heliocentric ICRF states (AU,
+    AU/day) of shape (3, n_epochs). The object's position is corrected for
+    light time by stepping back along its velocity. Returns arrays of shape
+    (n_sites, n_epochs): ra, dec (deg), v_mag, ra_rate, dec_rate ("/min).
+    """
+    states = [site_states(code, jd) for code in sites]
+    r_obs = r_earth[None] + np.stack([state[0] for state in states])  # (n_sites, 3, n)
+    v_obs = v_earth[None] + np.stack([state[1] for state in states])
+
+    tau = np.zeros((len(sites), 1, jd.size))
+    for _ in range(LIGHT_TIME_ITERATIONS):
+        rho = r_obj[None] - v_obj[None] * tau - r_obs
+        tau = np.linalg.norm(rho, axis=1, keepdims=True) / SPEED_OF_LIGHT
+    r_emit = r_obj[None] - v_obj[None] * tau
+    rho = r_emit - r_obs
+    delta = np.linalg.norm(rho, axis=1)
+    r = np.linalg.norm(r_emit, axis=1)
+
+    ra = np.arctan2(rho[:, 1], rho[:, 0])
+    dec = np.arcsin(rho[:, 2] / delta)
+    v_rel = v_obj[None] - v_obs
+    e_ra = np.stack([-np.sin(ra), np.cos(ra), np.zeros_like(ra)], axis=1)
+    e_dec = np.stack([-np.sin(dec) * np.cos(ra), -np.sin(dec) * np.sin(ra), np.cos(dec)], axis=1)
+    to_rate = ARCSEC_PER_RAD / 1440 / delta  # rad/day per AU -> "/min
+    ra_rate = np.sum(v_rel * e_ra, axis=1) * to_rate
+    dec_rate = np.sum(v_rel * e_dec, axis=1) * to_rate
+
+    phase = np.arccos(np.clip(np.sum(r_emit * rho, axis=1) / (r * delta), -1, 1))
+    v_mag = hg_magnitude(H, G, r, delta, phase)
+    return np.degrees(ra) % 360, np.degrees(dec), v_mag, ra_rate, dec_rate
+
+def local_observations(target, sites, start_date, end_date, H, G, orbit_key=None,
+                       use_cache=True, session=None, step="1d"):
+    """Apparent observations of one object from several sites, from cached state vectors
+
+    The object's and the Earth's heliocentric vectors are each fetched once
+    (and cached) on the UTC grid of the observer tables (vector_epochs);
+    every further site only costs the local computation. Returns
+    {site: OBSERVATION_DTYPE array}.
+    """
+    epochs = vector_epochs(start_date, end_date, step)
+    obj = cached_vectors(target, epochs, orbit_key, session, use_cache=use_cache)
+    earth = cached_vectors(EARTH_ID, epochs, session=session, use_cache=use_cache)
+    jd = np.asarray(obj["datetime_jd"], dtype=float)
+    r_obj, v_obj = state_columns(obj)
+    r_earth, v_earth = state_columns(earth)
+
+    ra, dec, v_mag, ra_rate, dec_rate = apparent_quantities(r_obj, v_obj, r_earth, v_earth,
+                                                            list(sites), jd, H, G)
+    utc = Time(jd, format="jd", scale="tdb").utc
+    timestamps = Time(np.round(utc.jd * 1440) / 1440, format="jd").strftime("%Y-%b-%d %H:%M")
+    results = {}
+    for k, site in enumerate(sites):
+        observations = np.empty(jd.size, dtype=OBSERVATION_DTYPE)
+        observations['timestamp'] = timestamps
+        observations['jd'] = utc.jd
+        observations['v_mag'] = v_mag[k]
+        observations['ra_rate'] = ra_rate[k]
+        observations['dec_rate'] = dec_rate[k]
+        observations['motion_rate'] = np.hypot(ra_rate[k], dec_rate[k])
+        observations['ra'] = ra[k]
+        observations['dec'] = dec[k]
+        results[site] = observations
+    return results
+
+def main():
+    """Compare one object's apparent motion from several sites"""
+    parser = argparse.ArgumentParser(description="Apparent V and rates per site from cached state vectors")
+    parser.add_argument("target", help="Horizons target, e.g. '433;' or 'DES=2024 AB1;'")
+    parser.add_argument("H", type=float)
+    parser.add_argument("--G", type=float, default=0.15)
+    parser.add_argument("--sites", nargs="+", default=["500", "I41"])
+    parser.add_argument("--start", default=START_DATE)
+    parser.add_argument("--end", default=END_DATE)
+    args = parser.parse_args()
+
+    results = local_observations(args.target, args.sites, args.start, args.end, args.H, args.G)
+    for site, observations in results.items():
+        passing = observations[passes_cuts(observations)]
+        print(f"{site}: {len(passing)} of {len(observations)} samples pass; "
+              f"peak {np.nanmax(observations['motion_rate']):.2f}\"/min, "
+              f"brightest V {np.nanmin(observations['v_mag']):.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import hashlib
+import requests
+import numpy as np
+
+from EphemerisCache import orbit_key
+
+# Catalog source and local snapshot
+MPC_URL = "https://www.minorplanetcenter.net/iau/MPCORB/NEA.txt"
+CATALOG_DIR = os.environ.get(
+    "STLC_CATALOG_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "catalog")
+)
+
+# Fixed-width MPCORB/NEA.txt layout (0-based, end-exclusive column slices)
+LINE_WIDTH = 202
+COLUMNS = {
+    'designation': (0, 7),
+    'H': (8, 13),
+    'G': (14, 19),
+    'epoch': (20, 25),
+    'M': (26, 35),
+    'peri': (37, 46),
+    'node': (48, 57),
+    'incl': (59, 68),
+    'e': (70, 79),
+    'n': (80, 91),
+    'a': (92, 103)
+}
+DEFAULT_G = 0.15  # Slope parameter used when the catalog leaves G blank
+
+CATALOG_DTYPE = np.dtype([
+    ('designation', 'U7'),
+    ('H', 'f8'),
+    ('G', 'f8'),
+    ('epoch_jd', 'f8'),
+    ('M', 'f8'),
+    ('peri', 'f8'),
+    ('node', 'f8'),
+    ('incl', 'f8'),
+    ('e', 'f8'),
+    ('n', 'f8'),
+    ('a', 'f8'),
+    ('orbit_key', 'U16')
+])
+
+def _char_matrix(lines):
+    """Pack catalog lines into an (n_lines, LINE_WIDTH) byte matrix"""
+    raw = np.array([line[:LINE_WIDTH].ljust(LINE_WIDTH).encode("ascii", "replace") for line in lines],
+                   dtype=f"S{LINE_WIDTH}")
+    return raw.view("S1").reshape(len(lines), LINE_WIDTH)
+
+def _field(chars, name):
+    """One fixed-width column as an array of byte strings"""
+    start, end = COLUMNS[name]
+    return np.ascontiguousarray(chars[:, start:end]).view(f"S{end - start}").ravel()
+
+def _float_field(chars, name, default=np.nan):
+    """One fixed-width numeric column, with blanks replaced by default"""
+    values = np.char.strip(_field(chars, name))
+    out = np.full(values.shape, default, dtype=float)
+    filled = values != b""
+    try:
+        out[filled] = values[filled].astype(float)
+    except ValueError:
+        out[filled] = [_safe_float(v, default) for v in values[filled]]
+    return out
+
+def _safe_float(value, default):
+    """float() of one field, falling back to default on malformed input"""
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+def _packed_digit(codes):
+    """Decode MPC packed digits 0-9, A-Z (10-35) and a-z (36-61)"""
+    codes = codes.astype(np.int64)
+    return np.where(codes <= ord("9"), codes - ord("0"),
+                    np.where(codes <= ord("Z"), codes - ord("A") + 10, codes - ord("a") + 36))
+
+def calendar_to_jd(year, month, day):
+    """Vectorized Gregorian calendar date (0h) to Julian Date"""
+    a = (14 - month) // 12
+    y = year + 4800 - a
+    m = month + 12 * a - 3
+    jdn = day + (153 * m + 2) // 5 + 365 * y + y // 4 - y // 100 + y // 400 - 32045
+    return jdn - 0.5
+
+def unpack_epochs(packed):
+    """Decode packed epochs such as b'K2555' to Julian Dates (0h TT)"""
+    codes = np.asarray(packed, dtype="S5").view(np.uint8).reshape(-1, 5)
+    century = _packed_digit(codes[:, 0])
+    year = century * 100 + (codes[:, 1].astype(np.int64) - ord("0")) * 10 \
+        + (codes[:, 2].astype(np.int64) - ord("0"))
+    month = _packed_digit(codes[:, 3])
+    day = _packed_digit(codes[:, 4])
+    return calendar_to_jd(year, month, day).astype(float)
+
+def parse_catalog(lines):
+    """Parse NEA.txt lines into a CATALOG_DTYPE structured array
+
+    One record is produced per input line, so indices match the sweep's
+    catalog indices. Blank numeric fields become NaN (G defaults to 0.15).
+    """
+    catalog = np.empty(len(lines), dtype=CATALOG_DTYPE)
+    if not len(lines):
+        return catalog
+
+    chars = _char_matrix(lines)
+    catalog['designation'] = np.char.strip(_field(chars, 'designation')).astype("U7")
+    catalog['H'] = _float_field(chars, 'H')
+    catalog['G'] = _float_field(chars, 'G', DEFAULT_G)
+    epochs = _field(chars, 'epoch')
+    has_epoch = np.char.strip(epochs) != b""
+    catalog['epoch_jd'] = np.nan
+    catalog['epoch_jd'][has_epoch] = unpack_epochs(epochs[has_epoch])
+    for name in ('M', 'peri', 'node', 'incl', 'e', 'n', 'a'):
+        catalog[name] = _float_field(chars, name)
+    catalog['orbit_key'] = [orbit_key(line) for line in lines]
+    return catalog
+
+def catalog_paths(directory=CATALOG_DIR):
+    """Locations of the raw text, parsed array and HTTP metadata of the snapshot"""
+    return {
+        'text': os.path.join(directory, "NEA.txt"),
+        'array': os.path.join(directory, "NEA.npy"),
+        'meta': os.path.join(directory, "NEA.meta.json")
+    }
+
+def _replace_file(path, write):
+    """Write a file through a temporary sibling and rename it into place"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def read_catalog_meta(directory=CATALOG_DIR):
+    """Metadata of the local snapshot, or an empty dict if there is none"""
+    try:
+        with open(catalog_paths(directory)['meta']) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def refresh_catalog(url=MPC_URL, directory=CATALOG_DIR):
+    """Revalidate the local NEA.txt snapshot and re-parse it only when it changed
+
+    Uses If-None-Match/If-Modified-Since so an unchanged catalog costs one
+    304 response. If the MPC cannot be reached an existing snapshot is kept.
+    Returns the snapshot metadata.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = catalog_paths(directory)
+    meta = read_catalog_meta(directory)
+    have_snapshot = os.path.exists(paths['text']) and os.path.exists(paths['array'])
+
+    headers = {}
+    if have_snapshot and meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if have_snapshot and meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        response = requests.get(url, headers=headers, timeout=300)
+        if response.status_code == 304:
+            print(f"📦 NEA.txt unchanged since {meta.get('last_modified') or meta.get('fetched')}")
+            return meta
+        response.raise_for_status()
+    except requests.RequestException as e:
+        if have_snapshot:
+            print(f"⚠️ Could not revalidate NEA.txt ({e}); using local snapshot")
+            return meta
+        raise
+
+    lines = [line for line in response.text.splitlines() if len(line) >= 7]
+    catalog = parse_catalog(lines)
+    _replace_file(paths['array'], lambda f: np.save(f, catalog, allow_pickle=False))
+    _replace_file(paths['text'], lambda f: f.write(response.content))
+
+    meta = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'fetched': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'sha1': hashlib.sha1(response.content).hexdigest(),
+        'n_objects': len(catalog)
+    }
+    _replace_file(paths['meta'], lambda f: f.write(json.dumps(meta, indent=1).encode()))
+    print(f"⬇️ Downloaded NEA.txt: {len(catalog)} objects")
+    return meta
+
+def load_catalog(directory=CATALOG_DIR):
+    """Open the parsed snapshot as a read-only memory-mapped structured array"""
+    return np.load(catalog_paths(directory)['array'], mmap_mode="r", allow_pickle=False)
+
+_orbit_keys = {}
+
+def lookup_orbit_key(designation, directory=CATALOG_DIR):
+    """Orbit key of one object in the local snapshot, or None if it is not listed
+
+    Accepts the packed catalog designation or an unpacked one, with spaces
+    or underscores (as in the mostoutput directory names).
+    """
+    if directory not in _orbit_keys:
+        try:
+            catalog = load_catalog(directory)
+        except OSError:
+            return None
+        _orbit_keys[directory] = dict(zip(catalog['designation'].tolist(), catalog['orbit_key'].tolist()))
+    keys = _orbit_keys[directory]
+    if designation in keys:
+        return keys[designation]
+    from Designations import pack_designation
+    return keys.get(pack_designation(designation.replace("_", " ")))
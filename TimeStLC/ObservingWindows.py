@@ -0,0 +1,81 @@
+import os
+import glob
+import numpy as np
+
+from CandidateStore import STORE_DIR, save_atomic
+
+# Observable windows: contiguous runs of passing days per asteroid
+MAX_GAP_DAYS = 1  # Same grouping rule the MOST stage used on asteroids.txt
+WINDOWS_SUBDIR = "windows"  # One committed window table per sweep shard
+WINDOWS_FILE = "windows.npy"  # Windows of the whole compacted store
+UNIX_EPOCH_DAY = 2440588  # floor(JD + 0.5) of 1970-01-01
+
+WINDOW_DTYPE = np.dtype([
+    ('asteroid_id', 'U12'),
+    ('start', 'U10'),  # First passing UTC date, YYYY-MM-DD
+    ('end', 'U10'),  # Last passing UTC date
+    ('start_jd', 'f8'),  # First and last passing samples
+    ('end_jd', 'f8'),
+    ('n_samples', 'i4'),
+    ('peak_rate', 'f8'),  # Fastest motion in the window ("/min)
+    ('brightest_v', 'f8')  # Brightest V in the window
+])
+
+def day_dates(day):
+    """ISO dates of integer UTC day numbers floor(JD + 0.5)"""
+    return (np.datetime64("1970-01-01") + (day - UNIX_EPOCH_DAY).astype("timedelta64[D]")).astype("U10")
+
+def windows_from_candidates(candidates, max_gap=MAX_GAP_DAYS):
+    """Group candidate rows into per-asteroid observable windows
+
+    Rows are sorted by asteroid and time, and a new window starts wherever
+    the asteroid changes or the UTC date jumps by more than max_gap days.
+    The grouping, extremes and counts are computed with run-length indices
+    and ufunc.reduceat, with no per-row Python loop.
+    """
+    windows = np.empty(0, dtype=WINDOW_DTYPE)
+    if not len(candidates):
+        return windows
+
+    rows = candidates[np.lexsort((candidates['jd'], candidates['asteroid_id']))]
+    day = np.floor(rows['jd'] + 0.5).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, (rows['asteroid_id'][1:] != rows['asteroid_id'][:-1])
+                                  | (np.diff(day) > max_gap)])
+    ends = np.r_[starts[1:], len(rows)] - 1
+
+    windows = np.empty(len(starts), dtype=WINDOW_DTYPE)
+    windows['asteroid_id'] = rows['asteroid_id'][starts]
+    windows['start'] = day_dates(day[starts])
+    windows['end'] = day_dates(day[ends])
+    windows['start_jd'] = rows['jd'][starts]
+    windows['end_jd'] = rows['jd'][ends]
+    windows['n_samples'] = ends - starts + 1
+    windows['peak_rate'] = np.fmax.reduceat(rows['motion_rate'], starts)
+    windows['brightest_v'] = np.fmin.reduceat(rows['v_mag'], starts)
+    return windows
+
+def windows_path(start, end, store_dir=STORE_DIR):
+    """Committed window table for the shard covering catalog indices [start, end)"""
+    return os.path.join(store_dir, WINDOWS_SUBDIR, f"shard_{start:06d}_{end:06d}.npy")
+
+def commit_windows(start, end, windows, store_dir=STORE_DIR):
+    """Atomically commit one shard's windows as soon as the shard finishes"""
+    path = windows_path(start, end, store_dir)
+    save_atomic(path, np.asarray(windows, dtype=WINDOW_DTYPE))
+    return path
+
+def save_windows(windows, store_dir=STORE_DIR):
+    """Write the window table of the whole store, replacing the shard tables"""
+    save_atomic(os.path.join(store_dir, WINDOWS_FILE), np.asarray(windows, dtype=WINDOW_DTYPE))
+    for path in glob.glob(os.path.join(store_dir, WINDOWS_SUBDIR, "shard_*.npy")):
+        os.remove(path)
+    print(f"🪟 Saved {len(windows)} observable windows for "
+          f"{len(np.unique(windows['asteroid_id']))} asteroids")
+
+def load_windows(store_dir=STORE_DIR):
+    """The store's window table, or the shard tables committed so far by a running sweep"""
+    path = os.path.join(store_dir, WINDOWS_FILE)
+    parts = sorted(glob.glob(os.path.join(store_dir, WINDOWS_SUBDIR, "shard_*.npy")))
+    if parts:
+        return np.concatenate([np.load(part, allow_pickle=False) for part in parts])
+    return np.load(path, allow_pickle=False)
@@ -0,0 +1,169 @@
+import numpy as np
+from astropy.time import Time
+
+from SweepEngine import V_LIMIT, RATE_LIMIT
+
+# Two-body prefilter parameters
+STEP_DAYS = 1.0  # Propagation grid spacing
+BATCH_SIZE = 500  # Objects propagated per vectorized batch
+V_MARGIN = 1.5  # Pass objects predicted within this many magnitudes of V_LIMIT
+RATE_FRACTION = 0.5  # ...and above this fraction of RATE_LIMIT
+CLOSE_DISTANCE = 0.05  # Always pass objects predicted to come within this (AU)
+KEPLER_ITERATIONS = 12
+
+# Analytic bound parameters
+BOUND_V_MARGIN = 1.0  # Keep objects whose brightest possible V is within this of V_LIMIT
+BOUND_RATE_FRACTION = 0.8  # Keep objects whose fastest possible rate exceeds this fraction of RATE_LIMIT
+EARTH_R_MIN = 0.983 - 0.01  # Earth's heliocentric distance range, padded for perturbations (AU)
+EARTH_R_MAX = 1.017 + 0.01
+EARTH_V_MAX = 0.0175  # Earth's maximum heliocentric speed (AU/day)
+
+GAUSS_K = 0.01720209895  # Gaussian gravitational constant (rad/day)
+ARCSEC_PER_RAD = 206264.80625
+
+# Earth-Moon barycentre mean elements and rates per Julian century (Standish, J2000)
+EARTH_ELEMENTS = {
+    'a': (1.00000261, 0.00000562),
+    'e': (0.01671123, -0.00004392),
+    'L': (100.46457166, 35999.37244981),
+    'varpi': (102.93768193, 0.32327364)
+}
+
+def solve_kepler(mean_anomaly, e):
+    """Vectorized Newton solution of Kepler's equation E - e sin E = M"""
+    E = np.where(e < 0.8, mean_anomaly, np.pi)
+    for _ in range(KEPLER_ITERATIONS):
+        E = E - (E - e * np.sin(E) - mean_anomaly) / (1 - e * np.cos(E))
+    return E
+
+def orbit_state(a, e, incl, node, peri, mean_anomaly, n):
+    """Heliocentric ecliptic position (AU) and velocity (AU/day) from elements
+
+    Angles are in radians and n in rad/day. Arrays broadcast, so a column of
+    objects against a row of epochs yields (n_objects, n_epochs) outputs.
+    """
+    E = solve_kepler(np.mod(mean_anomaly, 2 * np.pi), e)
+    cos_E, sin_E = np.cos(E), np.sin(E)
+    root = np.sqrt(1 - e**2)
+    E_dot = n / (1 - e * cos_E)
+
+    # Position and velocity in the orbital plane
+    x, y = a * (cos_E - e), a * root * sin_E
+    vx, vy = -a * sin_E * E_dot, a * root * cos_E * E_dot
+
+    cos_w, sin_w = np.cos(peri), np.sin(peri)
+    cos_O, sin_O = np.cos(node), np.sin(node)
+    cos_i, sin_i = np.cos(incl), np.sin(incl)
+    p = (cos_w * cos_O - sin_w * sin_O * cos_i, cos_w * sin_O + sin_w * cos_O * cos_i, sin_w * sin_i)
+    q = (-sin_w * cos_O - cos_w * sin_O * cos_i, -sin_w * sin_O + cos_w * cos_O * cos_i, cos_w * sin_i)
+
+    position = np.stack([p[k] * x + q[k] * y for k in range(3)])
+    velocity = np.stack([p[k] * vx + q[k] * vy for k in range(3)])
+    return position, velocity
+
+def earth_state(jd):
+    """Approximate heliocentric ecliptic state of the Earth-Moon barycentre"""
+    T = (jd - 2451545.0) / 36525.0
+    a = EARTH_ELEMENTS['a'][0] + EARTH_ELEMENTS['a'][1] * T
+    e = EARTH_ELEMENTS['e'][0] + EARTH_ELEMENTS['e'][1] * T
+    L = np.radians(EARTH_ELEMENTS['L'][0] + EARTH_ELEMENTS['L'][1] * T)
+    varpi = np.radians(EARTH_ELEMENTS['varpi'][0] + EARTH_ELEMENTS['varpi'][1] * T)
+    n = GAUSS_K / a**1.5
+    return orbit_state(a, e, 0.0, 0.0, varpi, L - varpi, n)
+
+def hg_magnitude(H, G, r, delta, phase):
+    """IAU H,G apparent magnitude"""
+    tan_half = np.tan(phase / 2)
+    phi1 = np.exp(-3.33 * tan_half**0.63)
+    phi2 = np.exp(-1.87 * tan_half**1.22)
+    with np.errstate(divide="ignore"):
+        return H + 5 * np.log10(r * delta) - 2.5 * np.log10((1 - G) * phi1 + G * phi2)
+
+def apparent_quantities(catalog, jd):
+    """Approximate geocentric V, sky-motion rate ("/min) and distance (AU)
+
+    Returns three (n_objects, n_epochs) arrays for the catalog records at the
+    given Julian Dates, using two-body motion from the osculating elements.
+    """
+    col = lambda name: catalog[name][:, None]
+    n = np.radians(col('n'))
+    mean_anomaly = np.radians(col('M')) + n * (jd[None, :] - col('epoch_jd'))
+    r_obj, v_obj = orbit_state(col('a'), col('e'), np.radians(col('incl')), np.radians(col('node')),
+                               np.radians(col('peri')), mean_anomaly, n)
+    r_earth, v_earth = earth_state(jd)
+    r_earth, v_earth = r_earth[:, None, :], v_earth[:, None, :]
+
+    geo = r_obj - r_earth
+    delta = np.sqrt(np.sum(geo**2, axis=0))
+    r = np.sqrt(np.sum(r_obj**2, axis=0))
+    cos_phase = np.sum(r_obj * geo, axis=0) / (r * delta)
+    phase = np.arccos(np.clip(cos_phase, -1, 1))
+    v_mag = hg_magnitude(col('H'), col('G'), r, delta, phase)
+
+    # Sky-plane angular rate from the velocity component transverse to the line of sight
+    v_rel = v_obj - v_earth
+    radial = np.sum(v_rel * geo, axis=0) / delta
+    transverse = np.sqrt(np.maximum(np.sum(v_rel**2, axis=0) - radial**2, 0))
+    motion_rate = transverse / delta * ARCSEC_PER_RAD / 1440
+    return v_mag, motion_rate, delta
+
+def prefilter_catalog(catalog, start_date, end_date, step_days=STEP_DAYS, batch_size=BATCH_SIZE):
+    """Flag catalog records that could plausibly pass the V and motion cuts
+
+    Records whose elements cannot be parsed are always kept, so the filter
+    only ever removes objects it has positive evidence against.
+    """
+    jd = np.arange(Time(start_date).jd, Time(end_date).jd + step_days, step_days)
+    keep = np.ones(len(catalog), dtype=bool)
+    elements = ('H', 'epoch_jd', 'M', 'peri', 'node', 'incl', 'e', 'n', 'a')
+    usable = np.all([np.isfinite(catalog[name]) for name in elements], axis=0) & (catalog['e'] < 1)
+
+    for start in range(0, len(catalog), batch_size):
+        rows = np.flatnonzero(usable[start:start + batch_size]) + start
+        if not rows.size:
+            continue
+        with np.errstate(invalid="ignore"):
+            v_mag, motion_rate, delta = apparent_quantities(catalog[rows], jd)
+            plausible = (v_mag < V_LIMIT + V_MARGIN) & (motion_rate > RATE_LIMIT * RATE_FRACTION)
+            close = delta < CLOSE_DISTANCE
+        keep[rows] = np.any(plausible | close, axis=1)
+
+    print(f"Two-body prefilter kept {np.count_nonzero(keep)} of {len(catalog)} objects "
+          f"({np.count_nonzero(~usable)} kept without usable elements)")
+    return keep
+
+def brightness_bound_filter(catalog):
+    """Exclude objects that provably never reach both cuts, from H, q and Q alone
+
+    The closest possible geocentric distance follows from how far the orbit's
+    perihelion q and aphelion Q stay from Earth's heliocentric distance range.
+    At that distance, zero phase angle gives the brightest possible V, and
+    the perihelion speed plus Earth's speed gives the fastest possible sky
+    motion. Earth-crossing orbits can reach zero distance and always pass.
+    """
+    a, e = catalog['a'], catalog['e']
+    q, Q = a * (1 - e), a * (1 + e)
+    usable = np.isfinite(catalog['H']) & np.isfinite(q) & (e < 1) & (q > 0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Minimum Earth distance and the heliocentric distance at which it occurs
+        outside = q > EARTH_R_MAX  # Amor-type orbits
+        inside = Q < EARTH_R_MIN  # Atira-type orbits
+        delta_min = np.where(outside, q - EARTH_R_MAX, np.where(inside, EARTH_R_MIN - Q, 0.0))
+        r_delta_min = np.where(
+            outside, q * delta_min,
+            np.where(inside, np.minimum(q * (EARTH_R_MIN - q), Q * (EARTH_R_MIN - Q)), 0.0)
+        )
+        v_brightest = catalog['H'] + 5 * np.log10(r_delta_min)
+
+        v_max = GAUSS_K * np.sqrt((1 + e) / q) + EARTH_V_MAX
+        rate_max = v_max / delta_min * ARCSEC_PER_RAD / 1440
+
+        too_faint = usable & (v_brightest > V_LIMIT + BOUND_V_MARGIN)
+        too_slow = usable & (rate_max < RATE_LIMIT * BOUND_RATE_FRACTION)
+
+    keep = ~(too_faint | too_slow)
+    print(f"Brightness bound excluded {np.count_nonzero(~keep)} of {len(catalog)} objects "
+          f"({np.count_nonzero(too_faint)} never reach V < {V_LIMIT}, "
+          f"{np.count_nonzero(too_slow)} never exceed {RATE_LIMIT}\"/min)")
+    return keep
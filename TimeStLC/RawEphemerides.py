@@ -0,0 +1,158 @@
+import os
+import glob
+import argparse
+import numpy as np
+from astropy.time import Time
+
+from CandidateStore import CANDIDATE_DTYPE, save_atomic
+
+# Raw ephemeris store: every sampled row, not just the ones passing the cuts
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+RAW_DIR = os.environ.get(  # One append-only binary file per sweep shard
+    "STLC_RAW_DIR", os.path.join(REPO_ROOT, "raw_ephemerides")
+)
+THRESHOLD_DIR = os.path.join(REPO_ROOT, "threshold_sweep")  # Candidate tables written by the offline sweep
+
+# 32 bytes per row: no timestamp string (it is rebuilt from jd) and float32 magnitudes/rates
+RAW_DTYPE = np.dtype([
+    ('asteroid_id', 'S12'),
+    ('jd', 'f8'),
+    ('v_mag', 'f4'),
+    ('ra_rate', 'f4'),  # "/min
+    ('dec_rate', 'f4')  # "/min
+])
+
+def raw_path(start, end, raw_dir=RAW_DIR):
+    """Raw ephemeris file for the shard covering catalog indices [start, end)"""
+    return os.path.join(raw_dir, f"shard_{start:06d}_{end:06d}.raw")
+
+def raw_rows(asteroid_id, observations):
+    """Pack an object's unfiltered observation array into RAW_DTYPE rows"""
+    rows = np.empty(len(observations), dtype=RAW_DTYPE)
+    rows['asteroid_id'] = asteroid_id
+    for name in RAW_DTYPE.names[1:]:
+        rows[name] = observations[name]
+    return rows
+
+class RawShardWriter:
+    """Append raw rows for one shard, trimmed to what its journal accounts for
+
+    On open the file is truncated to keep_rows rows, which drops both a torn
+    tail and any rows appended for an object that never reached the journal.
+    """
+
+    def __init__(self, path, keep_rows=0):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "ab")
+        self._file.truncate(keep_rows * RAW_DTYPE.itemsize)
+        self._file.seek(0, os.SEEK_END)
+        self.n_rows = keep_rows
+
+    def append(self, asteroid_id, observations):
+        """Append one object's rows; returns the file's row count afterwards"""
+        rows = raw_rows(asteroid_id, observations)
+        self._file.write(rows.tobytes())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.n_rows += len(rows)
+        return self.n_rows
+
+    def close(self):
+        self._file.close()
+
+def open_raw(path):
+    """Memory-map one raw shard file (whole rows only)"""
+    n_rows = os.path.getsize(path) // RAW_DTYPE.itemsize
+    if not n_rows:
+        return np.empty(0, dtype=RAW_DTYPE)
+    return np.memmap(path, dtype=RAW_DTYPE, mode="r", shape=(n_rows,))
+
+def raw_files(raw_dir=RAW_DIR):
+    """All raw shard files in the store"""
+    return sorted(glob.glob(os.path.join(raw_dir, "shard_*.raw")))
+
+def rows_to_candidates(rows):
+    """Expand raw rows to CANDIDATE_DTYPE, rebuilding Horizons-style timestamps"""
+    candidates = np.empty(len(rows), dtype=CANDIDATE_DTYPE)
+    candidates['asteroid_id'] = rows['asteroid_id'].astype(str)
+    if len(rows):
+        candidates['timestamp'] = Time(rows['jd'], format="jd", scale="utc").strftime("%Y-%b-%d %H:%M")
+    candidates['jd'] = rows['jd']
+    candidates['v_mag'] = rows['v_mag']
+    candidates['ra_rate'] = rows['ra_rate']
+    candidates['dec_rate'] = rows['dec_rate']
+    candidates['motion_rate'] = np.hypot(rows['ra_rate'].astype(float), rows['dec_rate'].astype(float))
+    return candidates
+
+def threshold_sweep(pairs, raw_dir=RAW_DIR, keep_rows=True):
+    """Evaluate many (V limit, rate limit) pairs over the raw store in one pass
+
+    Each shard file is read once and tested against all pairs at the same
+    time as a (n_pairs, n_rows) mask. Returns {pair: {'n_rows', 'n_objects',
+    'rows'}}, where rows is a CANDIDATE_DTYPE array (None without keep_rows).
+    """
+    v_limits = np.array([pair[0] for pair in pairs], dtype=float)[:, None]
+    rate_limits = np.array([pair[1] for pair in pairs], dtype=float)[:, None]
+    n_rows = np.zeros(len(pairs), dtype=np.int64)
+    objects = [set() for _ in pairs]
+    parts = [[] for _ in pairs]
+
+    for path in raw_files(raw_dir):
+        raw = open_raw(path)
+        if not len(raw):
+            continue
+        v_mag = np.asarray(raw['v_mag'], dtype=float)
+        motion_rate = np.hypot(np.asarray(raw['ra_rate'], dtype=float),
+                               np.asarray(raw['dec_rate'], dtype=float))
+        with np.errstate(invalid="ignore"):
+            passing = (v_mag[None, :] < v_limits) & (motion_rate[None, :] > rate_limits)
+        n_rows += passing.sum(axis=1)
+        for k in range(len(pairs)):
+            if not passing[k].any():
+                continue
+            rows = raw[passing[k]]
+            objects[k].update(np.unique(rows['asteroid_id']).tolist())
+            if keep_rows:
+                parts[k].append(rows)
+
+    results = {}
+    for k, pair in enumerate(pairs):
+        rows = None
+        if keep_rows:
+            rows = rows_to_candidates(np.concatenate(parts[k]) if parts[k]
+                                      else np.empty(0, dtype=RAW_DTYPE))
+        results[pair] = {'n_rows': int(n_rows[k]), 'n_objects': len(objects[k]), 'rows': rows}
+    return results
+
+def parse_pair(text):
+    """Parse a 'V:RATE' command-line pair such as '19.5:8'"""
+    v_limit, rate_limit = text.split(":")
+    return float(v_limit), float(rate_limit)
+
+def main():
+    """Offline multi-threshold sweep over the raw ephemeris store"""
+    parser = argparse.ArgumentParser(description="Re-run V/rate cuts offline on stored raw ephemerides")
+    parser.add_argument("pairs", nargs="+", type=parse_pair, metavar="V:RATE",
+                        help="Threshold pairs, e.g. 20:10 19.5:8")
+    parser.add_argument("--raw-dir", default=RAW_DIR)
+    parser.add_argument("--out-dir", default=THRESHOLD_DIR,
+                        help="Where to write one candidate table per pair")
+    parser.add_argument("--counts-only", action="store_true",
+                        help="Report counts without writing candidate tables")
+    args = parser.parse_args()
+
+    if not raw_files(args.raw_dir):
+        raise SystemExit(f"No raw ephemerides in {args.raw_dir}/; run SweepEngine.py --keep-raw first")
+
+    results = threshold_sweep(args.pairs, args.raw_dir, keep_rows=not args.counts_only)
+    print(f"{'V <':>6} {'rate >':>8} {'rows':>10} {'objects':>8}")
+    for (v_limit, rate_limit), result in results.items():
+        line = f"{v_limit:>6g} {rate_limit:>8g} {result['n_rows']:>10} {result['n_objects']:>8}"
+        if result['rows'] is not None:
+            path = os.path.join(args.out_dir, f"V{v_limit:g}_R{rate_limit:g}.npy")
+            save_atomic(path, result['rows'])
+            line += f"  -> {path}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+import json
+import time
+import numpy as np
+
+# Per-request timings of every network stage, appended as JSON lines
+TIMINGS_FILE = os.environ.get(  # Shared by the sweep and the image stage
+    "STLC_TIMINGS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "stage_timings.jsonl")
+)
+
+def record_timing(stage, seconds, n_bytes=None, path=TIMINGS_FILE):
+    """Append one request's duration (and payload size) for a stage
+
+    Each record is a single short append, so concurrent workers can share
+    the file. A failed write never interrupts the request being timed.
+    """
+    entry = {'stage': stage, 'seconds': round(seconds, 4), 'bytes': n_bytes, 'time': time.time()}
+    try:
+        with open(path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not record {stage} timing: {e}")
+
+class StageTimer:
+    """Context manager that records the duration of the block it wraps
+
+    Set .n_bytes inside the block to record the payload size as well.
+    Nothing is recorded when the block raises.
+    """
+
+    def __init__(self, stage, path=TIMINGS_FILE):
+        self.stage = stage
+        self.path = path
+        self.n_bytes = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            record_timing(self.stage, time.perf_counter() - self.start, self.n_bytes, self.path)
+        return False
+
+def timing_stats(path=TIMINGS_FILE):
+    """Median seconds and bytes per request, and the sample count, for each stage"""
+    samples = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn line from an interrupted append
+                samples.setdefault(entry['stage'], []).append((entry['seconds'], entry.get('bytes')))
+    except OSError:
+        return {}
+
+    stats = {}
+    for stage, values in samples.items():
+        sizes = [size for _, size in values if size is not None]
+        stats[stage] = {
+            'n': len(values),
+            'seconds': float(np.median([seconds for seconds, _ in values])),
+            'bytes': float(np.median(sizes)) if sizes else None
+        }
+    return stats
@@ -0,0 +1,40 @@
+import heapq
+import numpy as np
+
+# ZTF difference-image detection model
+EXPOSURE_S = 30  # ZTF exposure time
+SEEING_ARCSEC = 2.0  # Typical Palomar FWHM
+LIMITING_MAG = 20.5  # 5-sigma point-source depth of a 30 s frame
+LIMITING_SNR = 5
+TRAIL_A, TRAIL_B = 0.761, 1.162  # Trailing-loss fit for trailed-PSF photometry (Jones et al. 2018)
+
+def trailing_loss(rate, exposure=EXPOSURE_S, seeing=SEEING_ARCSEC):
+    """Magnitudes lost by spreading the flux along a trail of rate ("/min) during the exposure"""
+    x = rate * exposure / 60 / seeing  # Trail length in seeing disks
+    return 1.25 * np.log10(1 + TRAIL_A * x**2 / (1 + TRAIL_B * x))
+
+def trailed_snr(v_mag, rate, exposure=EXPOSURE_S, seeing=SEEING_ARCSEC, limiting_mag=LIMITING_MAG):
+    """Predicted SNR of a trailed source, background limited
+
+    SNR scales with flux, LIMITING_SNR at limiting_mag for a point source.
+    limiting_mag is for a EXPOSURE_S frame and is shifted by 1.25 log10 of
+    the exposure ratio. Unknown V or rate predicts 0.
+    """
+    depth = limiting_mag + 1.25 * np.log10(exposure / EXPOSURE_S)
+    snr = LIMITING_SNR * 10 ** (-0.4 * (v_mag + trailing_loss(rate, exposure, seeing) - depth))
+    return np.nan_to_num(snr, nan=0.0)
+
+def window_snr(windows, **model):
+    """Predicted trailed SNR of each window, at its brightest V and peak rate"""
+    return trailed_snr(windows['brightest_v'], windows['peak_rate'], **model)
+
+def priority_order(snr):
+    """Lazily yield indices from the highest predicted SNR down
+
+    A heap keeps the queue O(n) to build and O(log n) per step, so a
+    consumer that stops early never pays for sorting the tail.
+    """
+    heap = [(-value, index) for index, value in enumerate(np.asarray(snr, dtype=float).tolist())]
+    heapq.heapify(heap)
+    while heap:
+        yield heapq.heappop(heap)[1]
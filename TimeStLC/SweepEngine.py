@@ -0,0 +1,610 @@
+import os
+import json
+import shutil
+import argparse
+import numpy as np
+from astroquery.jplhorizons import Horizons
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from EphemerisCache import cached_ephemerides
+from MPCCatalog import MPC_URL, refresh_catalog, load_catalog
+from CandidateStore import (STORE_DIR, SHARDS_SUBDIR, CANDIDATE_DTYPE, shard_path,
+                            candidates_from_observations, commit_shard, compact_store, export_text,
+                            save_atomic)
+from ObservingWindows import WINDOWS_SUBDIR, windows_from_candidates, commit_windows, save_windows
+from WindowIndex import save_index
+from SweepJournal import (DONE, FAILED_TRANSIENT, ShardJournal, journal_path, call_with_retry,
+                          write_dead_letter, read_dead_letter)
+
+# Constants
+START_DATE = "2018-01-01"  # Observation start date
+END_DATE = "2025-01-01"  # Observation end date
+LOCATION = "500"  # Geocentric location (@500 for Earth)
+SHARD_SIZE = 500  # Asteroids per shard
+WORKERS = os.cpu_count() or 1  # One worker process per core
+SHARD_DIR = os.environ.get(  # Manifest, journals and sweep reports
+    "STLC_SHARD_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "sweep_shards")
+)
+MANIFEST_FILE = os.path.join(SHARD_DIR, "manifest.json")  # Shard manifest
+UNRESOLVED_FILE = os.path.join(SHARD_DIR, "unresolved.txt")  # Designations Horizons could not resolve
+JOURNAL_DIR = os.path.join(SHARD_DIR, "journal")  # Per-object outcome journals, one per shard
+DEAD_LETTER_FILE = os.path.join(SHARD_DIR, "dead_letter.jsonl")  # Objects that failed permanently
+SWEPT_FILE = os.path.join(SHARD_DIR, "swept_catalog.npy")  # Designations and orbit keys the store reflects
+SWEPT_DTYPE = np.dtype([('designation', 'U7'), ('orbit_key', 'U16')])
+MASTER_FILE = "all_valid_asteroids.txt"  # Legacy CSV export of the candidate store
+V_LIMIT = 20  # Brightness cut (V magnitude)
+RATE_LIMIT = 10  # Motion cut ("/min)
+OBSERVATION_DTYPE = np.dtype([
+    ('timestamp', 'U24'),
+    ('jd', 'f8'),
+    ('v_mag', 'f8'),
+    ('ra_rate', 'f8'),
+    ('dec_rate', 'f8'),
+    ('motion_rate', 'f8'),
+    ('ra', 'f8'),  # Astrometric RA/Dec (deg) for the visibility filter; NaN when not requested
+    ('dec', 'f8')
+])
+
+def fetch_asteroid_ids(mpc_url=MPC_URL):
+    """Fetch asteroid IDs from the locally cached MPC NEA catalog"""
+    try:
+        refresh_catalog(mpc_url)
+        return load_catalog()['designation'].tolist()
+    except Exception as e:
+        print(f"Error fetching MPC data: {e}")
+        return []
+
+def query_ephemerides(asteroid_id, location, start_date, end_date, session=None,
+                      orbit_key=None, use_cache=True, step='1d', lean=False, stage="horizons_sweep"):
+    """Query Horizons ephemerides (daily by default), optionally on a shared HTTP session
+
+    With use_cache the table is served from the shared EphemerisCache when
+    an entry exists for the same request and orbit solution. With lean only
+    the quantities the cuts need are requested and the response is parsed
+    into a structured array with the same column names (LeanHorizons).
+    Fetches are timed under stage, which the dry run reads for sweep queries.
+    """
+    epochs = {'start': start_date, 'stop': end_date, 'step': step}
+    if use_cache:
+        return cached_ephemerides(asteroid_id, location, epochs, orbit_key=orbit_key,
+                                  session=session, lean=lean, stage=stage)
+    if lean:
+        from LeanHorizons import lean_ephemerides
+        return lean_ephemerides(asteroid_id, location, epochs, session)
+
+    obj = Horizons(id=asteroid_id, location=location, epochs=epochs)
+    if session is not None:
+        obj._session = session  # Reuse pooled keep-alive connections
+    return obj.ephemerides()
+
+def ephemeris_columns(eph):
+    """Convert every row of an ephemeris table to an OBSERVATION_DTYPE array
+
+    Masked V or rate values become NaN. Rates are converted to "/min. RA
+    and Dec are NaN for tables without them (LeanHorizons).
+    """
+    names = eph.dtype.names if isinstance(eph, np.ndarray) else eph.colnames
+    v_mag = np.ma.filled(np.ma.asarray(eph["V"], dtype=float), np.nan)
+
+    # Convert rates from arcsec/hr to arcsec/min
+    ra_rate = np.ma.filled(np.ma.asarray(eph["RA_rate"], dtype=float), np.nan) / 60
+    dec_rate = np.ma.filled(np.ma.asarray(eph["DEC_rate"], dtype=float), np.nan) / 60
+
+    observations = np.empty(len(v_mag), dtype=OBSERVATION_DTYPE)
+    observations['timestamp'] = np.asarray(eph["datetime_str"])
+    observations['jd'] = np.asarray(eph["datetime_jd"], dtype=float)
+    observations['v_mag'] = v_mag
+    observations['ra_rate'] = ra_rate
+    observations['dec_rate'] = dec_rate
+    observations['motion_rate'] = np.hypot(ra_rate, dec_rate)  # Total motion rate
+    for field, name in (('ra', "RA"), ('dec', "DEC")):
+        observations[field] = np.nan
+        if name in names:
+            observations[field] = np.ma.filled(np.ma.asarray(eph[name], dtype=float), np.nan)
+    return observations
+
+def passes_cuts(observations, v_limit=V_LIMIT, rate_limit=RATE_LIMIT):
+    """Boolean mask of the rows brighter than v_limit and faster than rate_limit"""
+    with np.errstate(invalid="ignore"):
+        return (observations['v_mag'] < v_limit) & (observations['motion_rate'] > rate_limit)
+
+def filter_observations(eph, v_limit=V_LIMIT, rate_limit=RATE_LIMIT):
+    """Return the rows of an ephemeris table that pass the V and motion cuts
+
+    The cuts run as whole-column NumPy operations. Masked V or rate values
+    become NaN and therefore never pass. The result is a structured array
+    with OBSERVATION_DTYPE fields.
+    """
+    observations = ephemeris_columns(eph)
+    return observations[passes_cuts(observations, v_limit, rate_limit)]
+
+def observe_object(asteroid_id, location, start_date, end_date, orbit_key=None, use_cache=True,
+                   adaptive=False, session=None, unfiltered=False, lean=False, magnitude=None):
+    """Valid observations for one object, letting query errors propagate
+
+    With unfiltered every ephemeris row is returned, for the raw store. With
+    magnitude=(H, G) the object's state vectors are fetched (and cached)
+    instead, and V and rates are computed locally for the location
+    (LocalEphemeris).
+    """
+    if magnitude is not None:
+        from LocalEphemeris import local_observations
+        observations = local_observations(asteroid_id, [location], start_date, end_date, *magnitude,
+                                          orbit_key, use_cache, session)[location]
+        return observations if unfiltered else observations[passes_cuts(observations)]
+    if adaptive:
+        from AdaptiveStep import adaptive_observations
+        return adaptive_observations(asteroid_id, location, start_date, end_date,
+                                     orbit_key, use_cache, session, unfiltered, lean)
+    eph = query_ephemerides(asteroid_id, location, start_date, end_date, session=session,
+                            orbit_key=orbit_key, use_cache=use_cache, lean=lean)
+    return ephemeris_columns(eph) if unfiltered else filter_observations(eph)
+
+def check_conditions(asteroid_id, location, start_date, end_date, orbit_key=None, use_cache=True):
+    """Return valid observations with detailed parameters"""
+    try:
+        eph = query_ephemerides(asteroid_id, location, start_date, end_date,
+                                orbit_key=orbit_key, use_cache=use_cache)
+        return filter_observations(eph)
+    except Exception as e:
+        return np.empty(0, dtype=OBSERVATION_DTYPE)  # Suppress individual query errors
+
+def build_manifest(asteroid_ids, shard_size, orbit_keys=None, selected=None, targets=None,
+                   store_dir=STORE_DIR, magnitudes=None):
+    """Split the catalog into contiguous shards that cover every index once
+
+    selected flags the indices that still need a Horizons query; the rest
+    were excluded by a prefilter (or could not be resolved) and are covered
+    without one. targets are the Horizons IDs queried for each designation,
+    and magnitudes their catalog (H, G) for locally computed ephemerides.
+    """
+    if targets is None:
+        targets = asteroid_ids
+    if orbit_keys is None:
+        orbit_keys = [None] * len(asteroid_ids)
+    if selected is None:
+        selected = [True] * len(asteroid_ids)
+    if magnitudes is None:
+        magnitudes = [None] * len(asteroid_ids)
+    shards = []
+    for shard_id, start in enumerate(range(0, len(asteroid_ids), shard_size)):
+        end = min(start + shard_size, len(asteroid_ids))
+        shards.append({
+            'shard_id': shard_id,
+            'start': start,
+            'end': end,
+            'ids': asteroid_ids[start:end],
+            'targets': targets[start:end],
+            'orbit_keys': orbit_keys[start:end],
+            'selected': [bool(flag) for flag in selected[start:end]],
+            'magnitudes': magnitudes[start:end],
+            'file': shard_path(start, end, store_dir)
+        })
+
+    return {
+        'catalog_size': len(asteroid_ids),
+        'start_date': START_DATE,
+        'end_date': END_DATE,
+        'location': LOCATION,
+        'shards': shards
+    }
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    """Write the shard manifest next to the shard outputs"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=1)
+
+def process_shard(shard, options):
+    """Query every selected object of one shard and record which indices were covered
+
+    With options['async_fetch'] the shard's Horizons queries are issued
+    concurrently through AsyncHorizons instead of one at a time. With
+    options['adaptive'] the daily sweep is refined to hourly steps around
+    close approaches (AdaptiveStep). Indices not selected by the prefilter
+    are covered without a query. With options['keep_raw'] every ephemeris
+    row is also appended to the shard's raw file (RawEphemerides). With
+    options['visibility'] rows ZTF could not image are dropped (Visibility)
+    and the rejections are counted per constraint.
+
+    Each object's outcome is journaled as soon as it is known (in async mode
+    as each request completes), so an interrupted shard only repeats the
+    requests that were in flight. Objects the journal already lists as done
+    (or as permanent failures not being replayed) are not queried again. Transient failures are retried with
+    backoff and, if they persist, left uncovered for the next --resume.
+    """
+    location, start_date, end_date = options['location'], options['start_date'], options['end_date']
+    journal = ShardJournal(journal_path(shard['start'], shard['end'], options['journal_dir']),
+                           options['replay'])
+    raw_writer = None
+    if options['keep_raw']:
+        from RawEphemerides import RawShardWriter, raw_path
+        raw_writer = RawShardWriter(raw_path(shard['start'], shard['end']), journal.raw_extent())
+    rows = list(zip(shard['ids'], shard['targets'], shard['orbit_keys'], shard['selected']))
+    magnitudes = [None] * len(rows)
+    if options['vectors']:
+        magnitudes = [tuple(m) if m else None for m in shard.get('magnitudes') or magnitudes]
+
+    covered = []
+    parts = {}
+    n_skipped = n_resumed = n_failed = 0
+    rejected = {}
+    if options['visibility']:
+        from Visibility import CONSTRAINTS, visible
+        rejected = dict.fromkeys(CONSTRAINTS, 0)
+
+    def finish(index, asteroid_id, target, outcome):
+        """Filter one queried object's observations and journal its outcome"""
+        nonlocal n_failed
+        state, observations, error, attempts = outcome
+        candidates = raw_end = None
+        if state == DONE:
+            if raw_writer is not None:
+                raw_end = raw_writer.append(asteroid_id, observations)
+                observations = observations[passes_cuts(observations)]
+            if options['visibility']:
+                keep, counts = visible(observations)
+                observations = observations[keep]
+                for name, count in counts.items():
+                    rejected[name] += count
+            candidates = candidates_from_observations(asteroid_id, observations)
+        journal.record(index, asteroid_id, target, state, attempts, error, candidates, raw_end)
+        if state == FAILED_TRANSIENT:
+            n_failed += 1
+            return
+        if candidates is not None:
+            parts[index] = candidates
+        covered.append(index)
+
+    queued = {}
+    for index, ((asteroid_id, target, key, selected), magnitude) in enumerate(zip(rows, magnitudes),
+                                                                              shard['start']):
+        if not selected:
+            n_skipped += 1
+            covered.append(index)
+        elif journal.is_finished(index):
+            n_resumed += 1
+            parts[index] = journal.candidates(index)
+            covered.append(index)
+        elif options['async_fetch']:
+            queued.setdefault(target, []).append((index, asteroid_id))
+        else:
+            finish(index, asteroid_id, target, call_with_retry(
+                observe_object, target, location, start_date, end_date,
+                key, options['use_cache'], options['adaptive'], None, options['keep_raw'],
+                options['lean'], magnitude
+            ))
+
+    if queued:
+        # Each object is journaled as its request completes, so a crash only loses those in flight
+        from AsyncHorizons import fetch_observations
+
+        def on_result(target, outcome):
+            for index, asteroid_id in queued[target]:
+                finish(index, asteroid_id, target, outcome)
+
+        fetch_observations(list(queued), location, start_date, end_date,
+                           options['concurrency'], options['rate'],
+                           dict(zip(shard['targets'], shard['orbit_keys'])),
+                           options['use_cache'], options['adaptive'],
+                           with_status=True, unfiltered=options['keep_raw'],
+                           lean=options['lean'],
+                           magnitudes=dict(zip(shard['targets'], magnitudes)),
+                           on_result=on_result)
+    journal.close()
+    if raw_writer is not None:
+        raw_writer.close()
+
+    covered.sort()
+    parts = [parts[index] for index in sorted(parts)]
+    candidates = np.concatenate(parts) if parts else np.empty(0, dtype=CANDIDATE_DTYPE)
+    commit_shard(shard['start'], shard['end'], candidates, options['store_dir'])
+    commit_windows(shard['start'], shard['end'], windows_from_candidates(candidates), options['store_dir'])
+    n_valid = len(candidates)
+
+    return {'shard_id': shard['shard_id'], 'covered': covered, 'n_valid': n_valid,
+            'n_skipped': n_skipped, 'n_resumed': n_resumed, 'n_failed': n_failed,
+            'rejected': rejected}
+
+def index_ranges(indices):
+    """Collapse a sorted list of indices into 'a-b' range strings"""
+    ranges = []
+    for i in indices:
+        if ranges and ranges[-1][1] == i - 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+    return [f"{a}" if a == b else f"{a}-{b}" for a, b in ranges]
+
+def verify_coverage(manifest, results):
+    """Check that every catalog index was covered exactly once"""
+    counts = [0] * manifest['catalog_size']
+    for result in results:
+        for index in result['covered']:
+            counts[index] += 1
+
+    missing = [i for i, c in enumerate(counts) if c == 0]
+    duplicated = [i for i, c in enumerate(counts) if c > 1]
+    if missing:
+        print(f"❌ Indices not covered: {', '.join(index_ranges(missing))}")
+    if duplicated:
+        print(f"❌ Indices covered more than once: {', '.join(index_ranges(duplicated))}")
+    if not missing and not duplicated:
+        print(f"✅ All {manifest['catalog_size']} catalog indices covered exactly once")
+    return missing, duplicated
+
+def select_candidates(catalog, options):
+    """Flag the catalog entries worth a Horizons query"""
+    selected = np.ones(len(catalog), dtype=bool)
+    if not (options['bound_filter'] or options['prefilter']):
+        return selected
+
+    import Prefilter
+    if options['bound_filter']:
+        selected &= Prefilter.brightness_bound_filter(catalog)
+    if options['prefilter']:
+        survivors = np.flatnonzero(selected)
+        selected[survivors] = Prefilter.prefilter_catalog(catalog[survivors], options['start_date'],
+                                                          options['end_date'])
+    return selected
+
+def resolve_targets(asteroid_ids, selected):
+    """Map the selected designations to verified Horizons IDs, deselecting unknown ones
+
+    Only indices still selected after the prefilters are looked up.
+    Ambiguous or unknown designations are deselected and reported in
+    UNRESOLVED_FILE rather than silently producing zero candidates. A lookup
+    that failed transiently keeps the object selected under its catalog
+    designation, so the query's own retries and journal decide its fate.
+    """
+    from Designations import resolve_designations
+    wanted = np.flatnonzero(selected)
+    resolved = resolve_designations([asteroid_ids[index] for index in wanted])
+    targets = list(asteroid_ids)
+    unresolved = []
+    n_errors = 0
+    for index in wanted:
+        designation = asteroid_ids[index]
+        horizons_id, status, detail = resolved[designation]
+        if horizons_id is not None:
+            targets[index] = horizons_id
+        elif status == "error":
+            n_errors += 1
+        else:
+            selected[index] = False
+            unresolved.append(f"{index},{designation},{status},{detail or ''}\n")
+
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    with open(UNRESOLVED_FILE, "w") as f:
+        f.write("Index,Asteroid_ID,Status,Detail\n")
+        f.writelines(unresolved)
+    if unresolved:
+        print(f"⚠️ {len(unresolved)} designations could not be resolved; see {UNRESOLVED_FILE}")
+    if n_errors:
+        print(f"⚠️ {n_errors} lookups failed transiently; those objects are queried by designation "
+              f"and resolved again on the next run")
+    return targets
+
+def catalog_magnitudes(catalog):
+    """Catalog (H, G) pairs as manifest-ready lists"""
+    return np.column_stack([catalog['H'], catalog['G']]).tolist()
+
+def save_swept_catalog(designations, orbit_keys, path=SWEPT_FILE):
+    """Record which orbit solution of each designation the candidate store reflects"""
+    swept = np.empty(len(designations), dtype=SWEPT_DTYPE)
+    swept['designation'] = designations
+    swept['orbit_key'] = orbit_keys
+    save_atomic(path, swept)
+
+def load_resumable_manifest(snapshot, path=MANIFEST_FILE):
+    """Previous run's manifest, if it was built from the current catalog snapshot"""
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        print("No previous manifest to resume; starting a fresh sweep")
+        return None
+    if manifest.get('catalog_sha1') != snapshot.get('sha1'):
+        print("NEA.txt changed since the previous run; starting a fresh sweep")
+        return None
+    print(f"Resuming the sweep recorded in {path}")
+    return manifest
+
+def run_sweep(options):
+    """Shard the NEA catalog and sweep all shards across a process pool"""
+    try:
+        snapshot = refresh_catalog(MPC_URL)
+        catalog = load_catalog()
+    except Exception as e:
+        print(f"Error fetching MPC data: {e}")
+        return False
+    if not len(catalog):
+        print("No asteroid IDs fetched.")
+        return False
+
+    manifest = None
+    if options['resume'] or options['replay_dead_letter']:
+        manifest = load_resumable_manifest(snapshot)
+    if manifest is None:
+        shutil.rmtree(options['journal_dir'], ignore_errors=True)
+        shutil.rmtree(os.path.join(options['store_dir'], SHARDS_SUBDIR), ignore_errors=True)
+        shutil.rmtree(os.path.join(options['store_dir'], WINDOWS_SUBDIR), ignore_errors=True)
+        if options['keep_raw']:
+            from RawEphemerides import RAW_DIR
+            shutil.rmtree(RAW_DIR, ignore_errors=True)
+        asteroid_ids = catalog['designation'].tolist()
+        selected = select_candidates(catalog, options)
+        targets = None
+        if options['resolve_ids']:
+            targets = resolve_targets(asteroid_ids, selected)
+        manifest = build_manifest(asteroid_ids, options['shard_size'],
+                                  catalog['orbit_key'].tolist(), selected, targets,
+                                  options['store_dir'], catalog_magnitudes(catalog))
+        manifest['catalog_sha1'] = snapshot.get('sha1')
+        save_manifest(manifest)
+
+    options = dict(options, replay=frozenset())
+    if options['replay_dead_letter']:
+        options['replay'] = frozenset(read_dead_letter(DEAD_LETTER_FILE))
+        print(f"Replaying {len(options['replay'])} dead-lettered objects from {DEAD_LETTER_FILE}")
+    results = run_shards(manifest, options)
+
+    dead = write_dead_letter([journal_path(shard['start'], shard['end'], options['journal_dir'])
+                              for shard in manifest['shards']], DEAD_LETTER_FILE)
+    if dead:
+        print(f"⚠️ {len(dead)} objects failed permanently; see {DEAD_LETTER_FILE}")
+    missing, duplicated = verify_coverage(manifest, results)
+    if missing:
+        print("Rerun with --resume to retry the uncovered objects")
+    else:
+        save_swept_catalog(catalog['designation'], catalog['orbit_key'])
+    candidates = compact_store(options['store_dir'])
+    windows = windows_from_candidates(candidates)
+    save_windows(windows, options['store_dir'])
+    save_index(windows, options['store_dir'])
+    export_text(candidates, options['master_file'])
+    print(f"Processing complete. Data saved to {options['store_dir']}/ and {options['master_file']}")
+    return not missing and not duplicated
+
+def worker_options(options, n_workers):
+    """Options for each of n_workers processes, with the Horizons budgets split between them
+
+    --concurrency and --rate bound what Horizons sees from the whole sweep,
+    so each worker gets an equal share of both (at least one request in
+    flight).
+    """
+    shares = dict(options)
+    shares['concurrency'] = max(1, options['concurrency'] // n_workers)
+    shares['rate'] = options['rate'] / n_workers
+    return shares
+
+def run_shards(manifest, options):
+    """Sweep all shards of a manifest across a process pool"""
+    n_queried = sum(sum(shard['selected']) for shard in manifest['shards'])
+    n_workers = max(1, min(options['workers'], len(manifest['shards'])))
+    shares = worker_options(options, n_workers)
+    print(f"Processing {manifest['catalog_size']} asteroids ({n_queried} queried) "
+          f"in {len(manifest['shards'])} shards on {n_workers} workers")
+    if options['async_fetch']:
+        print(f"Each worker keeps up to {shares['concurrency']} Horizons requests in flight"
+              + (f" at {shares['rate']:.2f} starts/s" if shares['rate'] else ""))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = {
+            pool.submit(process_shard, shard, shares): shard
+            for shard in manifest['shards']
+        }
+        for future in as_completed(futures):
+            shard = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ Shard {shard['start']}-{shard['end']} failed: {e}")
+                continue
+            results.append(result)
+            print(f"Shard {shard['start']}-{shard['end']} done: "
+                  f"{result['n_valid']} valid observations, {result['n_skipped']} prefiltered, "
+                  f"{result['n_resumed']} resumed, {result['n_failed']} failed "
+                  f"({len(results)}/{len(manifest['shards'])} shards)")
+
+    rejected = {}
+    for result in results:
+        for name, count in result['rejected'].items():
+            rejected[name] = rejected.get(name, 0) + count
+    if rejected:
+        print("Rows rejected by the visibility filter: "
+              + ", ".join(f"{name} {count}" for name, count in rejected.items()))
+    return results
+
+def main():
+    """Main processing function for the full-catalog sweep"""
+    parser = argparse.ArgumentParser(description="Parallel NEA candidate sweep")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--master-file", default=MASTER_FILE)
+    parser.add_argument("--async-fetch", action="store_true",
+                        help="Keep several Horizons requests in flight in each worker")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="In-flight Horizons requests across all workers (with --async-fetch)")
+    parser.add_argument("--rate", type=float, default=8.0,
+                        help="Max Horizons request starts per second across all workers "
+                             "(with --async-fetch; 0 disables the limit)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the shared on-disk ephemeris cache")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Refine to hourly steps around close approaches")
+    parser.add_argument("--resolve-ids", action="store_true",
+                        help="Query verified Horizons IDs and report unresolvable designations")
+    parser.add_argument("--bound-filter", action="store_true",
+                        help="Skip objects whose H, q and Q rule out V < 20 or >10\"/min")
+    parser.add_argument("--prefilter", action="store_true",
+                        help="Skip objects a two-body propagation shows can never pass the cuts")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the previous sweep, skipping objects its journal marks done")
+    parser.add_argument("--replay-dead-letter", action="store_true",
+                        help="Resume and retry the objects listed in the dead-letter file")
+    parser.add_argument("--keep-raw", action="store_true",
+                        help="Store every ephemeris row for offline re-thresholding (RawEphemerides.py)")
+    parser.add_argument("--lean", action="store_true",
+                        help="Request only V and RA/DEC rates and parse Horizons text directly")
+    parser.add_argument("--delta", action="store_true",
+                        help="Only query objects that are new or whose elements changed since the "
+                             "last sweep, and merge them into the candidate store")
+    parser.add_argument("--vectors", action="store_true",
+                        help="Fetch state vectors once and compute V and rates locally for the site")
+    parser.add_argument("--location", default=LOCATION,
+                        help="MPC observatory code (with --vectors also a 'lon,rho_cos,rho_sin' triple)")
+    parser.add_argument("--visibility", action="store_true",
+                        help="Drop rows ZTF cannot image (declination, solar elongation, night at "
+                             "I41, airmass) and report rejections per constraint")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only estimate the requests, bytes, disk and time a run with these "
+                             "options would need (CostEstimate)")
+    args = parser.parse_args()
+    if args.vectors and (args.adaptive or args.lean):
+        parser.error("--vectors cannot be combined with --adaptive or --lean")
+    if args.visibility and args.lean:
+        parser.error("--visibility needs RA/Dec, which --lean does not request")
+    if args.delta and (args.keep_raw or args.resume or args.replay_dead_letter):
+        parser.error("--delta cannot be combined with --keep-raw, --resume or --replay-dead-letter")
+
+    options = {
+        'location': args.location,
+        'start_date': START_DATE,
+        'end_date': END_DATE,
+        'shard_size': args.shard_size,
+        'workers': args.workers,
+        'master_file': args.master_file,
+        'async_fetch': args.async_fetch,
+        'concurrency': args.concurrency,
+        'rate': args.rate,
+        'use_cache': not args.no_cache,
+        'adaptive': args.adaptive,
+        'resolve_ids': args.resolve_ids,
+        'bound_filter': args.bound_filter,
+        'prefilter': args.prefilter,
+        'resume': args.resume,
+        'replay_dead_letter': args.replay_dead_letter,
+        'keep_raw': args.keep_raw,
+        'lean': args.lean,
+        'vectors': args.vectors,
+        'visibility': args.visibility,
+        'journal_dir': JOURNAL_DIR,
+        'store_dir': STORE_DIR
+    }
+    if args.dry_run:
+        from CostEstimate import dry_run
+        dry_run(dict(options, delta=args.delta))
+        return
+    if args.delta:
+        from DeltaSweep import run_delta
+        if not run_delta(options):
+            raise SystemExit(1)
+        return
+    if not run_sweep(options):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import random
+import requests
+import numpy as np
+
+from CandidateStore import CANDIDATE_DTYPE
+
+# Per-object outcome states
+DONE = "done"
+FAILED_TRANSIENT = "failed_transient"  # Retried automatically on --resume
+FAILED_PERMANENT = "failed_permanent"  # Sent to the dead-letter file
+
+# Retry parameters
+MAX_ATTEMPTS = 5  # Horizons attempts per object before giving up for this run
+BACKOFF_BASE = 2.0  # Seconds; the backoff cap doubles after every failed attempt
+BACKOFF_MAX = 120.0  # Upper bound on a single backoff (s)
+
+# Horizons error messages that no retry will fix
+PERMANENT_MARKERS = ("Ambiguous", "Multiple", "Unknown target", "No matches",
+                     "No ephemeris for target", "Cannot interpret")
+
+def classify_error(error):
+    """Decide whether a failed query is worth retrying"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        if 400 <= status < 500 and status not in (408, 429):
+            return FAILED_PERMANENT
+        return FAILED_TRANSIENT
+    if isinstance(error, ValueError) and any(marker in str(error) for marker in PERMANENT_MARKERS):
+        return FAILED_PERMANENT
+    return FAILED_TRANSIENT  # Network errors, timeouts, 5xx and anything unexpected
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Exponential backoff with full jitter for the given 0-based attempt"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def call_with_retry(fn, *args, attempts=MAX_ATTEMPTS):
+    """Call fn(*args), retrying transient failures with jittered backoff
+
+    Returns (state, result, error, n_attempts). result is None unless the
+    state is DONE; error is a one-line description of the last failure.
+    """
+    for attempt in range(attempts):
+        try:
+            return DONE, fn(*args), None, attempt + 1
+        except Exception as e:
+            state = classify_error(e)
+            message = str(e).splitlines()[0] if str(e) else repr(e)
+            if state == FAILED_PERMANENT or attempt == attempts - 1:
+                return state, None, message, attempt + 1
+            time.sleep(backoff_delay(attempt))
+
+def journal_path(start, end, journal_dir):
+    """Journal file for the shard covering catalog indices [start, end)"""
+    return os.path.join(journal_dir, f"shard_{start:06d}_{end:06d}.jsonl")
+
+def parse_journal(data):
+    """Latest entry per index in journal bytes, and the length of its complete lines"""
+    complete = data.rfind(b"\n") + 1
+    entries = {}
+    for line in data[:complete].decode("utf-8", "replace").splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        entries[entry['index']] = entry
+    return entries, complete
+
+class ShardJournal:
+    """Append-only record of each object's outcome within one shard
+
+    Every finished object is appended (and fsynced) as one JSON line holding
+    its state and candidate rows, so a restarted sweep can pick up where a
+    crashed or interrupted one stopped. The last line for an index wins; a
+    torn final line from a crash is cut off when the journal is reopened.
+    """
+
+    def __init__(self, path, replay=()):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "rb+") as f:
+                data = f.read()
+                self.entries, complete = parse_journal(data)
+                if complete < len(data):
+                    f.truncate(complete)  # Drop a torn final line so the next record starts clean
+        self.replay = set(replay)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a")
+
+    def is_finished(self, index):
+        """True if the object needs no query in this run"""
+        entry = self.entries.get(index)
+        if entry is None or entry['state'] == FAILED_TRANSIENT:
+            return False
+        return entry['state'] == DONE or index not in self.replay
+
+    def candidates(self, index):
+        """Journaled candidate rows of a finished object"""
+        rows = self.entries[index].get('rows') or []
+        return np.array([tuple(row) for row in rows], dtype=CANDIDATE_DTYPE)
+
+    def raw_extent(self):
+        """Rows of the shard's raw ephemeris file accounted for by journaled objects"""
+        return max((entry.get('raw_end') or 0 for entry in self.entries.values()), default=0)
+
+    def record(self, index, asteroid_id, target, state, attempts, error=None, candidates=None,
+               raw_end=None):
+        """Append one object's outcome and force it to disk"""
+        entry = {
+            'index': index,
+            'id': asteroid_id,
+            'target': target,
+            'state': state,
+            'attempts': attempts,
+            'error': error,
+            'rows': candidates.tolist() if candidates is not None else [],
+            'raw_end': raw_end,
+            'time': time.time()
+        }
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.entries[index] = entry
+
+    def close(self):
+        self._file.close()
+
+def read_journal_entries(path):
+    """Latest entry per index from one shard journal, read without modifying it"""
+    with open(path, "rb") as f:
+        return parse_journal(f.read())[0]
+
+def write_dead_letter(journal_paths, path):
+    """Collect every object whose last outcome was a permanent failure
+
+    The file lists one object per line and is what --replay-dead-letter
+    reads, so lines can be removed by hand to replay only some objects.
+    """
+    dead = []
+    for journal_file in journal_paths:
+        if os.path.exists(journal_file):
+            entries = read_journal_entries(journal_file)
+            dead.extend(entry for entry in entries.values() if entry['state'] == FAILED_PERMANENT)
+    dead.sort(key=lambda entry: entry['index'])
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        for entry in dead:
+            f.write(json.dumps({key: entry[key] for key in ('index', 'id', 'target', 'attempts', 'error')})
+                    + "\n")
+    return dead
+
+def read_dead_letter(path):
+    """Catalog indices listed in a dead-letter file"""
+    indices = set()
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    indices.add(json.loads(line)['index'])
+    return indices
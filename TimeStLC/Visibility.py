@@ -0,0 +1,90 @@
+import numpy as np
+
+# ZTF visibility constraints at Palomar (I41)
+SITE_LONGITUDE = 243.1401  # East longitude (deg)
+SITE_LATITUDE = 33.3563  # Geodetic latitude (deg)
+DEC_MIN = -31.0  # Southern limit of the ZTF survey fields (deg)
+DEC_MAX = 90.0
+MIN_ELONGATION = 40.0  # Solar elongation (deg)
+SUN_ALT_MAX = -12.0  # ZTF observes between nautical twilights (deg)
+MAX_AIRMASS = 2.0
+SAMPLES_PER_ROW = 48  # Times tested within the span each row stands for
+MIN_SPAN_DAYS = 1 / 24  # Hourly rows (AdaptiveStep) stand for an hour, daily rows for a day
+
+CONSTRAINTS = ('declination', 'elongation', 'night', 'airmass')
+
+def sun_radec(jd):
+    """Low-precision geocentric RA/Dec of the Sun (deg, equinox of date; Astronomical Almanac)"""
+    n = jd - 2451545.0
+    g = np.radians(357.528 + 0.9856003 * n)
+    ecliptic_lon = np.radians(280.460 + 0.9856474 * n + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g))
+    obliquity = np.radians(23.439 - 4e-7 * n)
+    ra = np.arctan2(np.cos(obliquity) * np.sin(ecliptic_lon), np.cos(ecliptic_lon))
+    dec = np.arcsin(np.sin(obliquity) * np.sin(ecliptic_lon))
+    return np.degrees(ra), np.degrees(dec)
+
+def altitude(ra, dec, jd, longitude=SITE_LONGITUDE, latitude=SITE_LATITUDE):
+    """Altitude (deg) of RA/Dec positions at UT Julian dates for a site"""
+    lst = 280.46061837 + 360.98564736629 * (jd - 2451545.0) + longitude
+    hour_angle = np.radians(lst - ra)
+    dec, latitude = np.radians(dec), np.radians(latitude)
+    sin_alt = np.sin(latitude) * np.sin(dec) + np.cos(latitude) * np.cos(dec) * np.cos(hour_angle)
+    return np.degrees(np.arcsin(np.clip(sin_alt, -1, 1)))
+
+def separation(ra1, dec1, ra2, dec2):
+    """Angular separation (deg) between RA/Dec positions"""
+    ra1, dec1, ra2, dec2 = (np.radians(angle) for angle in (ra1, dec1, ra2, dec2))
+    cos_sep = np.sin(dec1) * np.sin(dec2) + np.cos(dec1) * np.cos(dec2) * np.cos(ra1 - ra2)
+    return np.degrees(np.arccos(np.clip(cos_sep, -1, 1)))
+
+def row_spans(jd):
+    """Time each row stands for: the gap to the object's next row, between an hour and a day"""
+    order = np.argsort(jd)
+    spans = np.empty(len(jd))
+    spans[order] = np.clip(np.diff(jd[order], append=np.inf), MIN_SPAN_DAYS, 1.0)
+    return spans
+
+def constraint_masks(observations, dec_min=DEC_MIN, min_elongation=MIN_ELONGATION,
+                     sun_alt_max=SUN_ALT_MAX, max_airmass=MAX_AIRMASS):
+    """Boolean mask per constraint of the rows that satisfy it
+
+    Declination and solar elongation are tested at the row's epoch. The
+    night and airmass tests ask whether the object is above the horizon
+    while the Sun is below sun_alt_max (night), and whether it also reaches
+    max_airmass (airmass), at any of SAMPLES_PER_ROW times across the span
+    the row stands for. The object is moved along its rates between those
+    times. Everything is evaluated as (rows, samples) arrays.
+    """
+    ra, dec, jd = observations['ra'], observations['dec'], observations['jd']
+    sun_ra, sun_dec = sun_radec(jd)
+    with np.errstate(invalid="ignore"):
+        masks = {
+            'declination': (dec >= dec_min) & (dec <= DEC_MAX),
+            'elongation': separation(ra, dec, sun_ra, sun_dec) >= min_elongation
+        }
+
+    minutes = row_spans(jd)[:, None] * 1440 * (np.arange(SAMPLES_PER_ROW) + 0.5) / SAMPLES_PER_ROW
+    times = jd[:, None] + minutes / 1440
+    grid_dec = np.clip(dec[:, None] + observations['dec_rate'][:, None] * minutes / 3600, -90, 90)
+    grid_ra = ra[:, None] + (observations['ra_rate'][:, None] * minutes / 3600
+                             / np.maximum(np.cos(np.radians(grid_dec)), 1e-6))
+    dark = altitude(*sun_radec(times), times) < sun_alt_max
+    object_alt = altitude(grid_ra, grid_dec, times)
+    with np.errstate(invalid="ignore"):
+        masks['night'] = np.any(dark & (object_alt > 0), axis=1)
+        # Plane-parallel airmass sec(z) <= max_airmass
+        masks['airmass'] = np.any(dark & (object_alt >= np.degrees(np.arcsin(1 / max_airmass))), axis=1)
+    return masks
+
+def visible(observations):
+    """Mask of the rows ZTF could image, and the number of rows failing each constraint
+
+    A row can fail several constraints; each one it fails is counted.
+    """
+    masks = constraint_masks(observations)
+    keep = np.ones(len(observations), dtype=bool)
+    rejected = {}
+    for name in CONSTRAINTS:
+        keep &= masks[name]
+        rejected[name] = int(np.count_nonzero(~masks[name]))
+    return keep, rejected
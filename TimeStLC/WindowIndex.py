@@ -0,0 +1,158 @@
+import os
+import argparse
+import numpy as np
+import astropy.units as u
+from astropy.time import Time
+
+from CandidateStore import STORE_DIR, save_atomic
+from ObservingWindows import WINDOW_DTYPE, load_windows
+
+# Persisted with the candidate store, next to windows.npy
+INDEX_FILE = "window_index.npy"
+SCAN_LEVEL = 3  # Subtrees this small are scanned linearly during a query
+
+INDEX_DTYPE = np.dtype(WINDOW_DTYPE.descr + [
+    ('cover_start', 'f8'),  # 00:00 UT of the first passing date
+    ('cover_end', 'f8'),  # 00:00 UT after the last passing date (exclusive)
+    ('max_end', 'f8')
+])
+
+def covered_span(windows):
+    """JD span [cover_start, cover_end) of the UTC dates each window covers
+
+    start_jd and end_jd are the first and last passing samples, which sit at
+    00:00 UT on the daily grid, so a window's last (or only) date would
+    otherwise end at its first instant.
+    """
+    cover_start = np.floor(windows['start_jd'] + 0.5) - 0.5
+    cover_end = np.floor(windows['end_jd'] + 0.5) + 0.5
+    return cover_start, cover_end
+
+def build_index(windows):
+    """Sort windows by start and augment them into an implicit interval tree
+
+    The sorted array is read as a complete binary tree: node i sits at level
+    k when its k lowest bits are all ones, and its children are i - 2**(k-1)
+    and i + 2**(k-1). Intervals are the covered_span of each window, and
+    max_end holds the latest cover_end in each node's subtree, which lets a
+    query skip every subtree that ends before it starts. Each level is
+    filled in with one vectorized step.
+    """
+    windows = np.asarray(windows, dtype=WINDOW_DTYPE)
+    index = np.empty(len(windows), dtype=INDEX_DTYPE)
+    if not len(windows):
+        return index
+    order = np.lexsort((windows['end_jd'], windows['start_jd']))
+    for name in WINDOW_DTYPE.names:
+        index[name] = windows[name][order]
+    index['cover_start'], index['cover_end'] = covered_span(index)
+
+    n = len(index)
+    max_end = index['cover_end'].copy()
+    last_i = (n - 1) & ~1  # Rightmost leaf
+    last = max_end[last_i]
+    k = 1
+    while 1 << k <= n:
+        x = 1 << (k - 1)
+        nodes = np.arange(2 * x - 1, n, 4 * x)
+        right = nodes + x
+        right_max = np.where(right < n, max_end[np.minimum(right, n - 1)], last)
+        max_end[nodes] = np.fmax(np.fmax(index['cover_end'][nodes], max_end[nodes - x]), right_max)
+        last_i = last_i - x if (last_i >> k) & 1 else last_i + x  # Parent of the previous last_i
+        if last_i < n and max_end[last_i] > last:
+            last = max_end[last_i]
+        k += 1
+    index['max_end'] = max_end
+    return index
+
+def max_level(n):
+    """Level of the root node for an index of n windows"""
+    return max(n.bit_length() - 1, 0)
+
+def overlapping(index, start_jd, end_jd):
+    """Positions of the windows whose covered dates overlap [start_jd, end_jd], in start order
+
+    Visits O(log n + k) nodes for k hits.
+    """
+    n = len(index)
+    hits = []
+    if not n:
+        return np.array(hits, dtype=np.int64)
+    starts, ends, max_end = index['cover_start'], index['cover_end'], index['max_end']
+    root = max_level(n)
+    stack = [((1 << root) - 1, root, False)]
+    while stack:
+        x, k, left_done = stack.pop()
+        if k <= SCAN_LEVEL:
+            i0 = x >> k << k
+            for i in range(i0, min(i0 + (1 << (k + 1)) - 1, n)):
+                if starts[i] > end_jd:
+                    break
+                if ends[i] > start_jd:
+                    hits.append(i)
+        elif not left_done:
+            stack.append((x, k, True))
+            y = x - (1 << (k - 1))  # Left child
+            if y >= n or max_end[y] > start_jd:
+                stack.append((y, k - 1, False))
+        elif x < n and starts[x] <= end_jd:
+            if ends[x] > start_jd:
+                hits.append(x)
+            stack.append((x + (1 << (k - 1)), k - 1, False))
+    return np.array(hits, dtype=np.int64)
+
+def save_index(windows, store_dir=STORE_DIR):
+    """Build the interval index for a window table and persist it with the store"""
+    index = build_index(windows)
+    save_atomic(os.path.join(store_dir, INDEX_FILE), index)
+    return index
+
+def load_index(store_dir=STORE_DIR):
+    """Open the persisted index, building it from the window table if it is missing or outdated"""
+    path = os.path.join(store_dir, INDEX_FILE)
+    if os.path.exists(path):
+        index = np.load(path, mmap_mode="r", allow_pickle=False)
+        if index.dtype == INDEX_DTYPE:
+            return index
+    return build_index(load_windows(store_dir))
+
+def observable(index, start, end=None, v_limit=None, min_rate=None):
+    """Windows observable at a time or during a time range
+
+    start and end are JDs or anything astropy Time accepts (e.g.
+    '2021-03-15 06:00'); a single time is a point query. A window matches
+    anywhere within its first to last passing UTC date. v_limit keeps windows
+    whose brightest V is below it and min_rate those whose peak rate
+    exceeds it.
+    """
+    start_jd = start if isinstance(start, float) else Time(start).jd
+    end_jd = start_jd if end is None else (end if isinstance(end, float) else Time(end).jd)
+    windows = index[overlapping(index, start_jd, end_jd)]
+    keep = np.ones(len(windows), dtype=bool)
+    if v_limit is not None:
+        keep &= windows['brightest_v'] < v_limit
+    if min_rate is not None:
+        keep &= windows['peak_rate'] > min_rate
+    return windows[keep]
+
+def main():
+    """Query which candidates are observable on a night or over a date range"""
+    parser = argparse.ArgumentParser(description="Which asteroids are observable when")
+    parser.add_argument("start", help="Date or time, e.g. 2021-03-15 or '2021-03-15 06:00'")
+    parser.add_argument("end", nargs="?", help="End of the range; without it the whole start date is queried")
+    parser.add_argument("--v-limit", type=float, help="Only windows brighter than this V")
+    parser.add_argument("--min-rate", type=float, help="Only windows faster than this (\"/min)")
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    args = parser.parse_args()
+
+    start = Time(args.start)
+    end = Time(args.end) if args.end else (start + 1 * u.day - 1 * u.s if len(args.start) <= 10 else start)
+    index = load_index(args.store_dir)
+    windows = observable(index, start.jd, end.jd, args.v_limit, args.min_rate)
+    print(f"{len(windows)} windows overlap {start.iso} .. {end.iso}")
+    for row in windows:
+        print(f"{row['asteroid_id']},{row['start']},{row['end']},"
+              f"{row['peak_rate']:.2f},{row['brightest_v']:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from SweepJournal import DONE, ShardJournal, read_journal_entries
+
+def test_record_after_torn_tail_survives(tmp_path):
+    path = str(tmp_path / "journal" / "shard_000000_000004.jsonl")
+    journal = ShardJournal(path)
+    journal.record(0, "A0", "A0", DONE, 1)
+    journal.record(1, "A1", "A1", DONE, 1)
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"index": 2, "id": "A2", "sta')  # Crash in the middle of a record
+
+    journal = ShardJournal(path)
+    assert sorted(journal.entries) == [0, 1]
+    journal.record(2, "A2", "A2", DONE, 1)
+    journal.record(3, "A3", "A3", DONE, 1)
+    journal.close()
+
+    assert sorted(read_journal_entries(path)) == [0, 1, 2, 3]
+    assert sorted(ShardJournal(path).entries) == [0, 1, 2, 3]
+
+def test_reading_leaves_torn_tail_in_place(tmp_path):
+    path = str(tmp_path / "shard_000000_000001.jsonl")
+    with open(path, "w") as f:
+        f.write('{"index": 0, "state": "done"}\n{"index": 1')
+    assert sorted(read_journal_entries(path)) == [0]
+    assert os.path.getsize(path) == len('{"index": 0, "state": "done"}\n{"index": 1')
@@ -0,0 +1,51 @@
+import os
+import sys
+import numpy as np
+from astropy.time import Time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from ObservingWindows import WINDOW_DTYPE, windows_from_candidates
+from WindowIndex import build_index, observable, overlapping
+
+CANDIDATE_DTYPE = np.dtype([('asteroid_id', 'U12'), ('jd', 'f8'), ('motion_rate', 'f8'), ('v_mag', 'f8')])
+
+def daily_candidates(asteroid_id, first_date, n_days):
+    """Passing rows at 00:00 UT on consecutive days, as the daily sweep grid produces them"""
+    jd0 = Time(first_date).jd
+    rows = np.empty(n_days, dtype=CANDIDATE_DTYPE)
+    rows['asteroid_id'] = asteroid_id
+    rows['jd'] = jd0 + np.arange(n_days)
+    rows['motion_rate'] = 20.0
+    rows['v_mag'] = 18.0
+    return rows
+
+def test_timed_query_inside_single_day_window():
+    windows = windows_from_candidates(np.concatenate([
+        daily_candidates("2019 AB", "2019-05-16", 1),
+        daily_candidates("2018 XY", "2018-04-11", 5)
+    ]))
+    index = build_index(windows)
+
+    hits = observable(index, "2019-05-16 08:00")
+    assert hits['asteroid_id'].tolist() == ["2019 AB"]
+    assert len(observable(index, "2019-05-17 00:00")) == 0
+
+def test_timed_query_on_last_day_of_window():
+    index = build_index(windows_from_candidates(daily_candidates("2018 XY", "2018-04-11", 5)))
+    assert len(observable(index, "2018-04-15 06:00")) == 1
+    assert len(observable(index, "2018-04-15")) == 1
+    assert len(observable(index, "2018-04-10 23:59")) == 0
+
+def test_overlapping_matches_linear_scan():
+    rng = np.random.default_rng(3)
+    windows = np.empty(500, dtype=WINDOW_DTYPE)
+    windows['asteroid_id'] = [f"A{i}" for i in range(len(windows))]
+    windows['start_jd'] = 2459000.5 + rng.integers(0, 365, len(windows))
+    windows['end_jd'] = windows['start_jd'] + rng.integers(0, 20, len(windows))
+    index = build_index(windows)
+
+    for start_jd in 2459000.5 + rng.uniform(-10, 400, 200):
+        end_jd = start_jd + rng.choice([0.0, rng.uniform(0, 30)])
+        expected = np.flatnonzero((index['cover_start'] <= end_jd) & (index['cover_end'] > start_jd))
+        assert sorted(overlapping(index, start_jd, end_jd).tolist()) == expected.tolist()